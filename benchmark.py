@@ -0,0 +1,206 @@
+import argparse
+import contextlib
+import copy
+import gc
+import os
+import random
+import time
+import tracemalloc
+
+import core
+import events
+import graph
+import restoration_policies
+import schedulers
+
+
+def run_until(env: core.Environment, arrivals: int) -> int:
+    """
+    Processes events until `arrivals` arrivals have been generated.
+    :return: the number of events processed
+    """
+    processed_events = 0
+    while len(env.events) > 0 and env._processed_arrivals < arrivals:
+        event_time, _, kind, payload = env.events.pop()
+        if kind == events.CANCELLED:
+            continue
+        env.current_time = event_time
+        events.HANDLERS[kind](env, payload)
+        processed_events += 1
+    return processed_events
+
+
+def measure_memory_per_service(args, topology, streaming: bool) -> None:
+    """
+    Measures the memory allocated by the simulation between its start and the steady state,
+    and divides it by the number of services active at that point.
+    """
+    args.streaming = streaming
+    args.scheduler = 'heap'
+    env = core.Environment(args, topology=topology, load=args.load, seed=args.seed)
+    env.number_disaster_occurences = 0  # only the lifecycle of services is measured
+    env.plot_tracked_stats_every = args.num_arrivals + 1
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):  # silences the simulation
+        gc.collect()
+        tracemalloc.start()
+        env.reset(seed=args.seed)
+        gc.collect()
+        initial_memory, _ = tracemalloc.get_traced_memory()
+        run_until(env, args.num_arrivals)
+        gc.collect()
+        final_memory, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    active_services = len(env.departure_events)
+    print(f'{args.topology_file} streaming={streaming}')
+    print('\tarrivals:'.ljust(30), env._processed_arrivals)
+    print('\tactive services:'.ljust(30), active_services)
+    print('\tallocated memory (bytes):'.ljust(30), final_memory - initial_memory)
+    print('\tpeak memory (bytes):'.ljust(30), peak_memory - initial_memory)
+    print('\tbytes per active service:'.ljust(30), f'{(final_memory - initial_memory) / max(active_services, 1):.1f}')
+
+
+def measure_event_throughput(args, topology, scheduler: str) -> None:
+    """
+    Measures the number of events processed per second by the simulation using the given scheduler,
+    and the number of hold operations (pop followed by push) per second of the scheduler alone
+    with as many entries as the number of events in the queue during the simulation.
+    """
+    args.streaming = True
+    args.scheduler = scheduler
+    env = core.Environment(args, topology=topology, load=args.load, seed=args.seed)
+    env.number_disaster_occurences = 0  # only arrivals and departures are measured
+    env.plot_tracked_stats_every = args.num_arrivals + 1
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):  # silences the simulation
+        env.reset(seed=args.seed)
+        start_time = time.perf_counter()
+        processed_events = run_until(env, args.num_arrivals)
+        simulation_time = time.perf_counter() - start_time
+
+    # hold model: the queue size is kept constant and new entries follow an exponential distribution
+    rng = random.Random(args.seed)
+    queue = schedulers.SCHEDULERS[scheduler]()
+    queue_size = max(len(env.events), 1)
+    for sequence in range(queue_size):
+        queue.push([rng.expovariate(1.), sequence, events.DEPARTURE, None])
+    start_time = time.perf_counter()
+    for sequence in range(queue_size, queue_size + processed_events):
+        entry = queue.pop()
+        queue.push([entry[0] + rng.expovariate(1.), sequence, events.DEPARTURE, None])
+    hold_time = time.perf_counter() - start_time
+
+    print(f'{args.topology_file} scheduler={scheduler}')
+    print('\tevents processed:'.ljust(30), processed_events)
+    print('\tevents per second:'.ljust(30), f'{processed_events / simulation_time:.0f}')
+    print('\tqueue size:'.ljust(30), queue_size)
+    print('\thold operations per second:'.ljust(30), f'{processed_events / hold_time:.0f}')
+
+
+def measure_restoration_time(args, topology) -> None:
+    """
+    Measures the time taken by each restoration policy to restore the services disrupted by the failure of the
+    `args.failed_links` links with the most running services, once `args.num_arrivals` arrivals have been generated.
+    Every policy restores a copy of the same disrupted services. Checks that the restored services respect the
+    residual capacities and avoid the failed links, and that the MILP restores at least as many services as the
+    greedy.
+    """
+    args.streaming = True
+    args.scheduler = 'heap'
+    env = core.Environment(args, topology=topology, load=args.load, seed=args.seed)
+    env.number_disaster_occurences = 0  # the failure is introduced below
+    env.plot_tracked_stats_every = args.num_arrivals + 1
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):  # silences the simulation
+        env.reset(seed=args.seed)
+        run_until(env, args.num_arrivals)
+
+    resources = env.resources
+    link_ids = sorted(range(len(resources.link_services)), key=lambda link_id: len(resources.link_services[link_id]),
+                      reverse=True)[:args.failed_links]
+    resources.link_failed[link_ids] = True
+    disrupted = {}
+    for link_id in link_ids:
+        disrupted.update(resources.link_services[link_id])
+    services = list(disrupted.values())
+    env.release_many(services)
+    env.remove_service_departures(services)
+    for service in services:
+        service.failed = True
+        service.relocated = False
+
+    policies = [restoration_policies.PathRestorationWithRelocationPolicy(), restoration_policies.BatchRestorationPolicy()]
+    try:
+        policies.append(restoration_policies.BatchRestorationPolicy(solver='milp'))
+    except ImportError as error:
+        print(f'{error}, skipping the MILP')
+    print(f'{args.topology_file} load={args.load} failed links={len(link_ids)} disrupted services={len(services)}')
+    restored = {}
+    for policy in policies:
+        policy_env, policy_services = copy.deepcopy((env, services))
+        policy_env.restoration_policy = policy
+        policy.env = policy_env
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start_time = time.perf_counter()
+            policy_services = policy.restore(policy_services)
+            restoration_time = time.perf_counter() - start_time
+        restored_services = [service for service in policy_services if not service.failed]
+        restored[policy.name] = len(restored_services)
+        feasible = policy_env.resources.link_available_units.min() >= 0 \
+            and policy_env.resources.node_available_units.min() >= 0 \
+            and not any(policy_env.resources.link_failed[service.route.link_ids].any() for service in restored_services)
+        print(f'\t{policy.name}')
+        print('\t\trestoration time (s):'.ljust(30), f'{restoration_time:.3f}')
+        print('\t\trestored services:'.ljust(30), len(restored_services))
+        print('\t\tcapacities respected:'.ljust(30), feasible)
+    if len(policies) > 2:
+        print('\tMILP restores at least as many services as the greedy:',
+              restored[policies[2].name] >= restored[policies[1].name])
+
+
+if __name__ == '__main__':
+    env = core.Environment()
+
+    parser = argparse.ArgumentParser(description='Benchmarks the memory used per active service, the event throughput '
+                                                 'of the schedulers or the time taken by the restoration policies')
+    parser.add_argument('-b', '--benchmark', default='memory', choices=['memory', 'scheduler', 'restoration'],
+                        help='Benchmark to be run (default=memory)')
+    parser.add_argument('-tf', '--topology_files', nargs='+', default=[env.topology_file],
+                        help='Network topology files to be used (default={})'.format(env.topology_file))
+    parser.add_argument('-a', '--num_arrivals', type=int, default=env.num_arrivals,
+                        help='Number of arrivals to be generated before measuring (default={})'.format(env.num_arrivals))
+    parser.add_argument('-l', '--load', type=int, default=600,
+                        help='Load in Erlangs of the traffic generated (default={})'.format(600))
+    parser.add_argument('-k', '--k_paths', type=int, default=env.k_paths,
+                        help='Number of k-shortest-paths to be considered (default={})'.format(env.k_paths))
+    parser.add_argument('-d', '--num_dcs', type=int, default=env.num_dcs,
+                        help='Number of datacenters to be placed (default={})'.format(env.num_dcs))
+    parser.add_argument('--dc_placement', default=env.dc_placement,
+                        help='DC placement criteria (default={})'.format(env.dc_placement))
+    parser.add_argument('--resource_units_per_link', type=int, default=env.resource_units_per_link,
+                        help='Network units of each link (default={})'.format(env.resource_units_per_link))
+    parser.add_argument('--resource_units_per_dc', type=int, default=env.resource_units_per_dc,
+                        help='Computing units of each DC (default={})'.format(env.resource_units_per_dc))
+    parser.add_argument('--failed_links', type=int, default=4,
+                        help='Number of links with the most services failed in the restoration benchmark '
+                             '(default={})'.format(4))
+    parser.add_argument('-s', '--seed', type=int, default=env.seed,
+                        help='Seed of the random numbers (default={})'.format(env.seed))
+    args = parser.parse_args()
+
+    for topology_file in args.topology_files:
+        args.topology_file = topology_file
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            topology = graph.get_topology(args)
+            topology = graph.get_dcs(args, topology)
+            topology = graph.get_ksp(args, topology)
+
+        if args.benchmark == 'memory':
+            measure_memory_per_service(args, topology, streaming=False)
+            measure_memory_per_service(args, topology, streaming=True)
+        elif args.benchmark == 'scheduler':
+            for scheduler in schedulers.SCHEDULERS:
+                measure_event_throughput(args, topology, scheduler)
+        else:
+            measure_restoration_time(args, topology)
@@ -1,18 +1,22 @@
 from dis import dis
 import logging
 import random
-import heapq
 import multiprocessing
-from typing import Any, Callable, List, Optional, Sequence
+from typing import Any, List, Optional, Sequence
 from dataclasses import dataclass, field
 import numpy as np
 from networkx import Graph
 from graph import Path
+from resources import ResourceState
+from service_log import ServiceLog
+import schedulers
+from traffic import TrafficGenerator, ReplayTrafficGenerator
+import traces
+from random_streams import RandomStreams
 import events
 import plots
 import routing_policies
 import restoration_policies
-import xml.etree.ElementTree as ET
 
 class Environment:
 
@@ -119,6 +123,24 @@ class Environment:
         if args is not None and hasattr(args, "plot_simulation_progress"):
             self.plot_simulation_progress = args.plot_simulation_progress
 
+        # in streaming mode, services are not kept after leaving the system, i.e., memory is proportional
+        # to the number of active services instead of the number of arrivals
+        self.streaming: bool = False
+        if args is not None and hasattr(args, "streaming"):
+            self.streaming = args.streaming
+
+        # writes the services that left the system to a binary log within the output folder
+        self.log_services: bool = False
+        if args is not None and hasattr(args, "log_services"):
+            self.log_services = args.log_services
+        self.service_log: ServiceLog = None  # initialized at every reset
+
+        # common random numbers: replays the traffic and disasters stored by `save_trace` for each (load, seed)
+        # instead of drawing them, so that all policies are compared on the same workload
+        self.crn: bool = False
+        if args is not None and hasattr(args, "crn"):
+            self.crn = args.crn
+
         self.num_arrivals: int = 100000
         if args is not None and hasattr(args, "num_arrivals"):
             self.num_arrivals = args.num_arrivals
@@ -164,6 +186,19 @@ class Environment:
         if args is not None and hasattr(args, "resource_units_per_link"):
             self.resource_units_per_link = args.resource_units_per_link
 
+        self.resource_units_per_dc: int = 1800  # computing units available at each DC
+        if args is not None and hasattr(args, "resource_units_per_dc"):
+            self.resource_units_per_dc = args.resource_units_per_dc
+
+        self.resources: ResourceState = None  # initialized at every reset
+        self.streams: RandomStreams = None  # initialized at every reset
+        self.traffic: TrafficGenerator = None  # initialized at every reset
+        self._source_ids: list = []  # node id of each source node
+        # random values of each disaster, indexed by the number of disasters processed (see `traces.draw_disaster_schedule`)
+        self.disaster_delays: list = []
+        self.disaster_durations: list = []
+        self.cascade_draws: list = []
+
         self.routing_policy: routing_policies.RoutingPolicy = routing_policies.ClosestAvailableDC()  # closest DC by default
         self.routing_policy.env = self
         if routing_policy is not None:
@@ -186,7 +221,8 @@ class Environment:
             self.seed = seed
             self.rng = random.Random(seed)
 
-        self.results: list = []  # initiates with an empty local results vector
+        # results of each seed simulated, indexed by routing policy, restoration policy and load
+        self.results: dict = {}  # initiates with an empty local results structure
         if results is not None:
             self.results = results
 
@@ -210,9 +246,17 @@ class Environment:
         for obs in self.tracked_statistics:
             self.tracked_results[obs] = []
 
-        self.events: list = []  # event queue
+        # name of the scheduler implementing the event queue (see `schedulers.SCHEDULERS`)
+        self.scheduler: str = 'heap'
+        if args is not None and hasattr(args, 'scheduler'):
+            self.scheduler = args.scheduler
+        self.events: schedulers.Scheduler = schedulers.SCHEDULERS[self.scheduler]()  # event queue
+        self.departure_events: dict = {}  # service id -> departure entry in the event queue
+        self._event_sequence: int = 0  # tie-breaker for events scheduled at the same time
         self._processed_arrivals: int = 0
         self._rejected_services: int = 0
+        self.total_service_time: float = 0.  # running sum of the service time of provisioned services that left the system
+        self.total_holding_time: float = 0.  # running sum of the holding time of the same services
         self.current_time: int = 0.0
 
         self.output_folder: str = 'data'
@@ -227,32 +271,22 @@ class Environment:
         self.priority_class_list = self.priority_class_inicialization()
 
     def setup_disaster_zones(self):
+        """
+        Creates the list of disaster zones of the simulation from the zones read with the topology
+        (see `graph.read_disaster_zones`), which is changed as the disasters of each zone happen.
+        """
         self.current_disaster_zone = []
         self.disaster_zones_list = []
         self.links = []
-        tfpath = "config/topologies/"+self.topology_file
-        elementTree = ET.parse(tfpath)
-        root = elementTree.getroot()
-
-        for zone in root.findall(".//zone"):
+        for zone in self.topology.graph['disaster_zones']:
             regions_in_zone = []
-            for region in root.findall(".//zone[@id='"+zone.attrib['id']+"']/region"):
+            for region in zone:
                 links = []
-                for link in root.findall(".//zone[@id='"+zone.attrib['id']+"']/region[@id='"+region.attrib['id']+"']/disaster_link"):
-                    link_tuple = []
-                    for src in root.findall(".//link[@id='"+link.text+"']/source"):
-                        link_src = src.text
-                    for tgt in root.findall(".//link[@id='"+link.text+"']/target"):
-                        link_tgt = tgt.text
-                    
-                    self.topology[link_src][link_tgt]['link_failure_probability'] = float(link.attrib['probability'])
-                    link_tuple = []
-                    link_tuple.append(link_src)
-                    link_tuple.append(link_tgt)
-                    link_tuple.append(float(link.attrib['probability']))
-                    links.append(link_tuple)
+                for link_src, link_tgt, probability in region:
+                    self.resources.link_failure_probability[self.resources.get_link_id(link_src, link_tgt)] = probability
+                    links.append([link_src, link_tgt, probability])
                 regions_in_zone.append(links)
-            self.disaster_zones_list.append(regions_in_zone)  
+            self.disaster_zones_list.append(regions_in_zone)
 
         for idx, z in enumerate(self.disaster_zones_list):
             print("Zona: ", idx+1)
@@ -278,17 +312,14 @@ class Environment:
         '''
         return priority_class_list
 
-    def compute_simulation_stats(self):
+    def compute_simulation_stats(self) -> dict:
+        """
+        Summarizes the statistics of the simulation just finished, appends them to `self.results` and returns them.
+        """
         # run here the code to summarize statistics from this specific run
         if self.plot_simulation_progress:
             plots.plot_simulation_progress(self)
-        
-        total_service_time: float = 0.
-        total_holding_time: float = 0.
-        for service in self.services:
-            if service.provisioned and service.service_time!=None:
-                total_service_time += service.service_time
-                total_holding_time += service.holding_time
+
         # add here the code to include other statistics you may want
         avg_hops_restaured_services = 0
         average_restorability = 1
@@ -317,13 +348,19 @@ class Environment:
         if self.adjusted_disrupted_services>0:
             adjusted_restorability += (self.adjusted_restored/self.adjusted_disrupted_services)/self.number_disaster_processed
 
-        self.results[self.routing_policy.name][self.restoration_policy.name][self.load].append({
+        link_utilization = self.resources.get_link_utilization(self.current_time)
+        node_utilization = self.resources.get_node_utilization(self.current_time)
+
+        record = {
             'request_blocking_ratio': self.get_request_blocking_ratio(),
-            'average_link_usage': np.mean([self.topology[n1][n2]['utilization'] for n1, n2 in self.topology.edges()]),
-            'individual_link_usage': [self.topology[n1][n2]['utilization'] for n1, n2 in self.topology.edges()],
-            'average_node_usage': np.mean([self.topology.nodes[node]['utilization'] for node in self.topology.graph['dcs']]),
-            'individual_node_usage': {node: self.topology.nodes[node]['utilization'] for node in self.topology.graph['dcs']},
-            'average_availability': total_service_time / total_holding_time,
+            'average_link_usage': float(np.mean(link_utilization)),
+            'individual_link_usage': link_utilization.tolist(),
+            'average_node_usage': float(np.mean(node_utilization)),
+            'individual_node_usage': {node: float(node_utilization[idx]) for idx, node in enumerate(self.topology.graph['dcs'])},
+            'individual_link_assigned_services': self.resources.link_assigned_services.tolist(),
+            'individual_node_assigned_services': {node: int(self.resources.node_assigned_services[self.resources.node_index[node]])
+                                                  for node in self.topology.graph['dcs']},
+            'average_availability': self.total_service_time / self.total_holding_time,
             'average_restorability': average_restorability,
             'average_relocation': average_relocation,
             'avg_loss_cost': avg_loss_cost,
@@ -350,7 +387,10 @@ class Environment:
             'total_restored_73':self.num_restored_73,
             'total_restored_15':self.num_restored_15,
             'total_restored_5':self.num_restored_5
-        })
+        }
+        self.results.setdefault(self.routing_policy.name, {}).setdefault(self.restoration_policy.name, {})\
+            .setdefault(self.load, []).append(record)
+        return record
         
     def is_empty(self, list):
         empty = 1
@@ -386,7 +426,12 @@ class Environment:
         #Returns the priority_class selected
         return priority_choose
         
-    def reset(self, seed=None, id_simulation=None):
+    def reset(self, seed=None, id_simulation=None, trace=None):
+        """
+        Prepares the environment for a new simulation.
+        If a `trace` (see `traces.generate_trace`) is given, its arrivals and disaster schedule are replayed
+        instead of being drawn. Traces converted with `traces.as_lists` are shared without being copied.
+        """
         self.time_last_cascade:float  = 0.0
         self.num_failed_epi:int =0
         self.num_failed_73:int =0
@@ -407,10 +452,13 @@ class Environment:
         self.cascade_happened_73 = 0
         self.cascade_happened_15 = 0
         self.cascade_happened_5 = 0
-        self.setup_disaster_zones()
-        self.events = []  # event queue
+        self.events = schedulers.SCHEDULERS[self.scheduler]()  # event queue
+        self.departure_events = {}
+        self._event_sequence = 0
         self._processed_arrivals = 0
         self._rejected_services = 0
+        self.total_service_time = 0.
+        self.total_holding_time = 0.
         self.current_time = 0.0
         self.total_hops_disrupted_services = 0.0
         self.total_hops_restaured_services = 0.0
@@ -447,37 +495,36 @@ class Environment:
         self.repeat_disaster = 1
 
         # (re)-initialize the graph
-        self.topology.graph['running_services'] = []
         for idx, lnk in enumerate(self.topology.edges()):
-            self.topology[lnk[0]][lnk[1]]['available_units'] = self.resource_units_per_link
-            self.topology[lnk[0]][lnk[1]]['total_units'] = self.resource_units_per_link
-            self.topology[lnk[0]][lnk[1]]['services'] = []
-            self.topology[lnk[0]][lnk[1]]['running_services'] = []
             self.topology[lnk[0]][lnk[1]]['id'] = idx
-            self.topology[lnk[0]][lnk[1]]['utilization'] = 0.0
-            self.topology[lnk[0]][lnk[1]]['last_update'] = 0.0
-            self.topology[lnk[0]][lnk[1]]['link_failure_probability'] = 0
-            self.topology[lnk[0]][lnk[1]]['current_failure_probability'] = 0
         for idx, node in enumerate(self.topology.nodes()):
             if self.topology.nodes[node]['dc']:
-                #self.topology.nodes[node]['available_units'] = self.topology.degree(node) * self.resource_units_per_link
-                #self.topology.nodes[node]['total_units'] = self.topology.degree(node) * self.resource_units_per_link
-                self.topology.nodes[node]['available_units'] = 1800 #juliana alterou de 1800 para 100000
-                self.topology.nodes[node]['total_units'] = 1800 #juliana
-                #self.topology.nodes[node]['available_units'] = 700
-                #self.topology.nodes[node]['total_units'] = 700
-                self.topology.nodes[node]['services'] = []
-                self.topology.nodes[node]['running_services'] = []
                 self.topology.nodes[node]['id'] = idx
-                self.topology.nodes[node]['utilization'] = 0.0
-                self.topology.nodes[node]['last_update'] = 0.0
-                self.topology.nodes[node]['total_storage'] = 0
-                self.topology.nodes[node]['available_storage'] = 0
-                self.topology.nodes[node]['node_failure_probability'] =0
-            else:
-                self.topology.nodes[node]['node_failure_probability'] =0
-                self.topology.nodes[node]['available_units'] = 0
-                self.topology.nodes[node]['total_units'] = 0        
+
+        # (re)-initialize the resources
+        self.resources = ResourceState(self.topology, self.resource_units_per_link, self.resource_units_per_dc)
+        self.streams = RandomStreams(self.seed, self.load, self.routing_policy.name, self.restoration_policy.name)
+        self.rng = random.Random(self.streams.link_failures_seed)
+        if trace is None and self.crn:
+            trace = traces.load_trace(self.get_trace_file(self.seed))
+        if trace is not None:
+            disaster_schedule = traces.as_lists(trace)
+            self.traffic = ReplayTrafficGenerator(disaster_schedule)
+        else:
+            self.traffic = TrafficGenerator(self.streams, self.mean_service_inter_arrival_time,
+                                            self.mean_service_holding_time, len(self.topology.graph['source_nodes']))
+            disaster_schedule = traces.as_lists(traces.draw_disaster_schedule(
+                self.streams.disasters, self.number_disaster_occurences, self.mean_failure_inter_arrival_time,
+                self.mean_failure_duration))
+        self.disaster_delays = disaster_schedule['disaster_delays']
+        self.disaster_durations = disaster_schedule['disaster_durations']
+        self.cascade_draws = disaster_schedule['cascade_draws']
+        self._source_ids = [self.resources.node_index[src] for src in self.topology.graph['source_nodes']]
+
+        if self.log_services:
+            self.service_log = ServiceLog('./results/{}/services_{}_{}_{}_{}.bin'.format(self.output_folder,
+                                          self.routing_policy.name, self.restoration_policy.name, self.load, self.id_simulation))
+        self.setup_disaster_zones()
         
         self.setup_next_arrival()
 
@@ -488,11 +535,9 @@ class Environment:
         """
         if self._processed_arrivals > self.num_arrivals:
             return  # returns None when all arrivals have been processed
-        at = self.current_time + self.rng.expovariate(1 / self.mean_service_inter_arrival_time)
-
-        ht = self.rng.expovariate(1 / self.mean_service_holding_time)
-        src = self.rng.choice([x for x in self.topology.graph['source_nodes']])
-        src_id = self.topology.graph['node_indices'].index(src)
+        at, ht, src_idx, computing_units = self.traffic.next()
+        src = self.topology.graph['source_nodes'][src_idx]
+        src_id = self._source_ids[src_idx]
 
         #Randomly picks a class for the service
         #TODO: use self.rng
@@ -502,24 +547,11 @@ class Environment:
 
         if self._processed_arrivals % self.track_stats_every == 0:
             self.tracked_results['request_blocking_ratio'].append(self.get_request_blocking_ratio())
-            self.tracked_results['average_link_usage']\
-                .append(np.mean([
-                    (self.topology[n1][n2]['total_units'] - self.topology[n1][n2]['available_units'])
-                    / self.topology[n1][n2]['total_units'] for n1, n2 in self.topology.edges()
-                ]))
-            self.tracked_results['average_node_usage'].append(np.mean([(self.topology.nodes[node]['total_units'] -
-                                                                        self.topology.nodes[node]['available_units']) /
-                                                                       self.topology.nodes[node]['total_units'] for node
-                                                                       in self.topology.graph['dcs']]))
+            self.tracked_results['average_link_usage'].append(self.resources.get_average_link_usage())
+            self.tracked_results['average_node_usage'].append(self.resources.get_average_node_usage())
             # failure-related stats
-            total_service_time: float = 0.
-            total_holding_time: float = 0.
-            for service in self.services:
-                if service.provisioned and service.service_time is not None:  # only the services which already left the system, i.e., have a service time
-                    total_service_time += service.service_time
-                    total_holding_time += service.holding_time
-            if total_holding_time!=0:
-                self.tracked_results['average_availability'].append(total_service_time / total_holding_time)
+            if self.total_holding_time != 0:
+                self.tracked_results['average_availability'].append(self.total_service_time / self.total_holding_time)
             if self.number_disrupted_services > 0:  # avoid division by zero
                 self.tracked_results['average_restorability'].append(self.number_restored_services / self.number_disrupted_services)
                 self.tracked_results['average_relocation'].append(self.number_relocated_services / self.number_disrupted_services)
@@ -560,7 +592,7 @@ class Environment:
                                holding_time=ht,
                                source=src, 
                                source_id=src_id,
-                               computing_units=random.randint(1, 5), #TODO: use self.rng
+                               computing_units=computing_units,
                                priority_class=pc,
                                service_disaster_id=None)
         #print("==passagem==")                       
@@ -585,7 +617,7 @@ class Environment:
                 if len(self.aux_disaster_zone)>0:
                     for region in self.aux_disaster_zone:
                         for link in region:
-                            self.topology[link[0]][link[1]]['current_failure_probability'] = 0
+                            self.resources.link_current_failure_probability[self.resources.get_link_id(link[0], link[1])] = 0
                 print(self.number_disaster_processed)
                 print(self.current_disaster_zone)
                 self.aux_disaster_zone = self.current_disaster_zone.copy()
@@ -620,8 +652,9 @@ class Environment:
             self.this_disaster_services = []
             self.adjusted_disrupted_services = 0
             self.adjusted_restored = 0 
-        self.services.append(next_arrival)
-        self.add_event(Event(next_arrival.arrival_time, events.arrival, next_arrival))
+        if not self.streaming:
+            self.services.append(next_arrival)
+        self.add_event(next_arrival.arrival_time, events.ARRIVAL, next_arrival)
 
         #if(self.number_disaster_processed<self.number_disaster_occurences):
             ##if next fail is an epicente    
@@ -669,7 +702,7 @@ class Environment:
             #    print("self.next_disaster_point: ",self.next_disaster_point)
                      
         #self.services.append(next_arrival)
-        #self.add_event(Event(next_arrival.arrival_time, events.arrival, next_arrival))
+        #self.add_event(next_arrival.arrival_time, events.ARRIVAL, next_arrival)
 
     def set_load(self, load=None, mean_service_holding_time=None):
         if load is not None:
@@ -678,63 +711,217 @@ class Environment:
             self.mean_service_holding_time = mean_service_holding_time
         self.mean_service_inter_arrival_time = 1 / float(self.load / float(self.mean_service_holding_time))
 
-    def add_event(self, event):
+    def add_event(self, time: float, kind: int, payload: Any):
         """
         Adds an event to the event list of the simulator.
-        This implementation is based on the functionalities of heapq: https://docs.python.org/2/library/heapq.html
-        :param event:
-        :return: None
+        The event queue is implemented by one of the schedulers in `schedulers`, selected by `self.scheduler`.
+        Each entry is a list [time, sequence, kind, payload], where the sequence number breaks ties between events
+        scheduled at the same time, so that entries never compare their kind or payload. The kind is one of the
+        event codes in `events`, which indexes the handler in `events.HANDLERS` that receives the payload.
+        Cancelled entries are kept in the heap with the kind set to `events.CANCELLED` (lazy deletion) and
+        are skipped by `run_simulation`.
+        :param time: time at which the event happens
+        :param kind: event code, e.g., `events.ARRIVAL`
+        :param payload: object passed to the handler, e.g., the service or the failure
+        :return: the entry pushed to the event queue, which can be used as a handle to cancel the event
         """
-        # self.debug("time={}; event={}".format(event.time, event.call))
-        heapq.heappush(self.events, (event.time, event))
-    
-    def remove_service_departure(self, service) -> None:
-        for event in self.events:
-            if event[1].params == service:
-                self.events.remove(event)
-                break
+        entry = [time, self._event_sequence, kind, payload]
+        self._event_sequence += 1
+        self.events.push(entry)
+        return entry
+
+    def remove_service_departure(self, service) -> bool:
+        """
+        Cancels the departure scheduled for the service in O(1) by marking its entry as removed.
+        :return: True if a departure was scheduled for the service, False otherwise
+        """
+        entry = self.departure_events.pop(service.service_id, None)
+        if entry is None:
+            return False
+        entry[2] = events.CANCELLED
+        return True
+
+    def remove_service_departures(self, services) -> int:
+        """
+        Cancels the departures scheduled for several services at once, e.g., the ones disrupted by a disaster.
+        :return: the number of departures that were scheduled and are now cancelled
+        """
+        departure_events = self.departure_events
+        removed = 0
+        for service in services:
+            entry = departure_events.pop(service.service_id, None)
+            if entry is not None:
+                entry[2] = events.CANCELLED
+                removed += 1
+        return removed
+
+    def reschedule_service_departure(self, service, time: float) -> None:
+        """
+        Moves the departure of the service to a new time in O(log n).
+        """
+        self.remove_service_departure(service)
+        self.departure_events[service.service_id] = self.add_event(time, events.DEPARTURE, service)
 
     def provision_service(self, service):
         service.destination = service.route.node_list[-1]
-        service.destination_id = self.topology.graph['node_indices'].index(service.destination)
+        service.destination_id = self.resources.node_index[service.destination]
 
         # provisioning service at the DC
-        self.topology.nodes[service.destination]['available_units'] -= service.computing_units
-        self.topology.nodes[service.destination]['services'].append(service)
-        self.topology.nodes[service.destination]['running_services'].append(service)
-        self._update_node_stats(service.destination)
+        self._update_node_stats(service.destination_id, service.computing_units)
+        self.resources.node_available_units[service.destination_id] -= service.computing_units
+        self.resources.node_assigned_services[service.destination_id] += 1
+        self.resources.node_services[service.destination_id][service.service_id] = service
 
         # provisioning the path
-        for i in range(len(service.route.node_list) - 1):
-            self.topology[service.route.node_list[i]][service.route.node_list[i + 1]]['available_units'] -= service.network_units
-            self.topology[service.route.node_list[i]][service.route.node_list[i + 1]]['services'].append(service)
-            self.topology[service.route.node_list[i]][service.route.node_list[i + 1]]['running_services'].append(service)
-            self._update_link_stats(service.route.node_list[i], service.route.node_list[i + 1])
+        link_ids = service.route.link_ids
+        self._update_link_stats(link_ids, service.network_units)
+        self.resources.link_available_units[link_ids] -= service.network_units
+        self.resources.link_assigned_services[link_ids] += 1
+        link_services = self.resources.link_services
+        for link_id in link_ids.tolist():
+            link_services[link_id][service.service_id] = service
         service.provisioned = True
-
-        self.topology.graph['running_services'].append(service)
         self._update_network_stats()
 
         # schedule departure
-        self.add_event(Event(service.arrival_time + service.holding_time, events.departure, service))
+        self.departure_events[service.service_id] = self.add_event(service.arrival_time + service.holding_time, events.DEPARTURE, service)
 
     def reject_service(self, service):
         service.provisioned = False
         self._rejected_services += 1
+        if self.service_log is not None:
+            self.service_log.add(service)
+
+    def set_service_time(self, service, service_time: float) -> None:
+        """
+        Sets the service time and availability of a service leaving the system, i.e., departing or being dropped,
+        and keeps the running sums used to compute the average availability.
+        If the service time was already set, its previous value is replaced in the sums.
+        """
+        first_time = service.service_time is None
+        if service.provisioned:  # only the provisioned services are accounted in the availability
+            if not first_time:
+                self.total_service_time -= service.service_time
+                self.total_holding_time -= service.holding_time
+            self.total_service_time += service_time
+            self.total_holding_time += service.holding_time
+        service.service_time = service_time
+        service.availability = service_time / service.holding_time
+        if first_time and self.service_log is not None:
+            self.service_log.add(service)
 
     def release_path(self, service):
         # provisioning service at the DC
-        self.topology.nodes[service.destination]['available_units'] += service.computing_units
-        if service in self.topology.nodes[service.destination]['running_services']:
-            self.topology.nodes[service.destination]['running_services'].remove(service)
-        self._update_node_stats(service.destination)
-        for i in range(len(service.route.node_list) - 1):
-            self.topology[service.route.node_list[i]][service.route.node_list[i + 1]]['available_units'] += service.network_units
-            if service in self.topology[service.route.node_list[i]][service.route.node_list[i + 1]]['running_services']:
-                self.topology[service.route.node_list[i]][service.route.node_list[i + 1]]['running_services'].remove(service)
-            self._update_link_stats(service.route.node_list[i], service.route.node_list[i + 1])
+        self._update_node_stats(service.destination_id, -service.computing_units)
+        self.resources.node_available_units[service.destination_id] += service.computing_units
+        self.resources.node_services[service.destination_id].pop(service.service_id, None)
+        link_ids = service.route.link_ids
+        self._update_link_stats(link_ids, -service.network_units)
+        self.resources.link_available_units[link_ids] += service.network_units
+        link_services = self.resources.link_services
+        for link_id in link_ids.tolist():
+            link_services[link_id].pop(service.service_id, None)
         self._update_network_stats()
 
+    def _get_units_per_element(self, services):
+        """
+        Returns the ids of the links and DCs used by the routes of the services, one entry per use,
+        with the units used by each entry.
+        """
+        link_ids = np.concatenate([service.route.link_ids for service in services])
+        link_units = np.repeat([service.network_units for service in services],
+                               [len(service.route.link_ids) for service in services])
+        node_ids = np.array([service.destination_id for service in services], dtype=np.int64)
+        node_units = np.array([service.computing_units for service in services], dtype=np.int64)
+        return link_ids, link_units, node_ids, node_units
+
+    def provision_many(self, assignments) -> None:
+        """
+        Provisions several services at once, each one over the path given, e.g., the decisions of a batch restoration.
+        The units allocated are aggregated per link and DC with `np.add.at`, so that the resource arrays and
+        the time-weighted statistics are updated once per element, and the departures are merged into the
+        event queue at once. The result is the same as setting the route and calling `provision_service`
+        for each service in order.
+        :param assignments: sequence of (service, path) tuples
+        """
+        if len(assignments) == 0:
+            return
+        resources = self.resources
+        services = []
+        for service, path in assignments:
+            service.route = path
+            service.destination = path.node_list[-1]
+            service.destination_id = resources.node_index[service.destination]
+            services.append(service)
+        link_ids, link_units, node_ids, node_units = self._get_units_per_element(services)
+
+        self._update_link_stats(np.unique(link_ids), 0)
+        self._update_node_stats(np.unique(node_ids), 0)
+        np.subtract.at(resources.link_available_units, link_ids, link_units)
+        np.subtract.at(resources.node_available_units, node_ids, node_units)
+        resources.link_busy_units += int(np.sum(link_units))
+        resources.node_busy_units += int(np.sum(node_units))
+        np.add.at(resources.link_assigned_services, link_ids, 1)
+        np.add.at(resources.node_assigned_services, node_ids, 1)
+
+        link_services = resources.link_services
+        node_services = resources.node_services
+        entries = []
+        for service in services:
+            node_services[service.destination_id][service.service_id] = service
+            for link_id in service.route.link_ids.tolist():
+                link_services[link_id][service.service_id] = service
+            service.provisioned = True
+            # departures get sequence numbers in the order of the assignments, as with `add_event`
+            entry = [service.arrival_time + service.holding_time, self._event_sequence, events.DEPARTURE, service]
+            self._event_sequence += 1
+            self.departure_events[service.service_id] = entry
+            entries.append(entry)
+        self._update_network_stats()
+        self.events.push_many(entries)
+
+    def release_many(self, services) -> None:
+        """
+        Releases the resources of several services at once, e.g., the ones disrupted by a disaster.
+        The units released are aggregated per link and DC with `np.add.at`, so that the resource arrays and
+        the time-weighted statistics are updated once per element, with the same result as calling
+        `release_path` for each service.
+        """
+        if len(services) == 0:
+            return
+        resources = self.resources
+        link_ids, link_units, node_ids, node_units = self._get_units_per_element(services)
+
+        self._update_link_stats(np.unique(link_ids), 0)
+        self._update_node_stats(np.unique(node_ids), 0)
+        np.add.at(resources.link_available_units, link_ids, link_units)
+        np.add.at(resources.node_available_units, node_ids, node_units)
+        resources.link_busy_units -= int(np.sum(link_units))
+        resources.node_busy_units -= int(np.sum(node_units))
+
+        link_services = resources.link_services
+        node_services = resources.node_services
+        for service in services:
+            node_services[service.destination_id].pop(service.service_id, None)
+            for link_id in service.route.link_ids.tolist():
+                link_services[link_id].pop(service.service_id, None)
+        self._update_network_stats()
+
+    def get_trace_file(self, seed: int) -> str:
+        return './results/{}/traces/trace_{}_{}.npz'.format(self.output_folder, self.load, seed)
+
+    def generate_trace(self, seed: int) -> dict:
+        """
+        Generates the arrivals and the disaster schedule that a simulation with this load and `seed` would draw,
+        to be saved with `traces.save_trace` and replayed in the common random numbers mode.
+        """
+        streams = RandomStreams(seed, self.load, self.routing_policy.name, self.restoration_policy.name)
+        traffic = TrafficGenerator(streams, self.mean_service_inter_arrival_time,
+                                   self.mean_service_holding_time, len(self.topology.graph['source_nodes']))
+        # arrivals are generated until more than `num_arrivals` have been processed
+        return traces.generate_trace(traffic, self.num_arrivals + 1, streams.disasters, self.number_disaster_occurences,
+                                     self.mean_failure_inter_arrival_time, self.mean_failure_duration)
+
     def setup_next_link_failure(self):
         """
         Returns the next arrival to be scheduled in the simulator
@@ -750,7 +937,7 @@ class Environment:
 
         failure = LinkFailure(link, at, duration)
 
-        self.add_event(Event(failure.arrival_time, events.link_failure_arrival, failure))
+        self.add_event(failure.arrival_time, events.LINK_FAILURE_ARRIVAL, failure)
 
    # The following function executes a disaster according 
    # to the disaster_zones_list, formed by zones and regions 
@@ -763,13 +950,14 @@ class Environment:
             return
         region_to_fail = []
         nodes_to_fail=[]
+        disaster_id = self.number_disaster_processed
 
 
         if(self.current_disaster_zone[0]!=[]):
-            at = self.current_time + self.rng.expovariate(1/self.mean_failure_inter_arrival_time)
+            at = self.current_time + self.disaster_delays[disaster_id]
             for region in self.current_disaster_zone:
                 for link in region:
-                    self.topology[link[0]][link[1]]['current_failure_probability'] = float(link[2]) #index 2 is probability
+                    self.resources.link_current_failure_probability[self.resources.get_link_id(link[0], link[1])] = float(link[2]) #index 2 is probability
                     
             region_to_fail = self.current_disaster_zone[0].copy()
             self.epicenter_happened = 1
@@ -782,15 +970,15 @@ class Environment:
                         link_src_tgt.append(item)
                 links_to_fail.append(link_src_tgt)
 
-            duration = self.rng.expovariate(1/self.mean_failure_duration)
+            duration = self.disaster_durations[disaster_id][0]
             self.time_aux_for_next_cascade = (at + duration)#juliana
             if at != None:
                 disaster = DisasterFailure(links_to_fail, nodes_to_fail, at, duration)
-                self.add_event(Event(disaster.arrival_time, events.disaster_arrival, disaster))
+                self.add_event(disaster.arrival_time, events.DISASTER_ARRIVAL, disaster)
             self.current_disaster_zone[0] = []
 
             #73%
-            reg_prob = self.rng.randint(1,100)
+            reg_prob = self.cascade_draws[disaster_id][0]
             at += 3600.0
             if reg_prob <= 73 and self.current_disaster_zone[1]!=[]:
                 region_to_fail = self.current_disaster_zone[1].copy()
@@ -803,15 +991,15 @@ class Environment:
                         if idx<2:
                             link_src_tgt.append(item)
                     links_to_fail.append(link_src_tgt)
-                duration = self.rng.expovariate(1/self.mean_failure_duration)
+                duration = self.disaster_durations[disaster_id][1]
                 self.time_aux_for_next_cascade = (at + duration)#juliana
                 if at != None:
                     disaster = DisasterFailure(links_to_fail, nodes_to_fail, at, duration)
-                    self.add_event(Event(disaster.arrival_time, events.disaster_arrival, disaster))
+                    self.add_event(disaster.arrival_time, events.DISASTER_ARRIVAL, disaster)
             self.current_disaster_zone[1] = []
             
             #15%
-            reg_prob = self.rng.randint(1,100)
+            reg_prob = self.cascade_draws[disaster_id][1]
             at += 3600.0
             if reg_prob <= 15 and self.current_disaster_zone[2]!=[]:
                 region_to_fail = self.current_disaster_zone[2].copy()
@@ -825,15 +1013,15 @@ class Environment:
                             link_src_tgt.append(item)
                     links_to_fail.append(link_src_tgt)
 
-                duration = self.rng.expovariate(1/self.mean_failure_duration)
+                duration = self.disaster_durations[disaster_id][2]
                 self.time_aux_for_next_cascade = (at + duration)#juliana
                 if at != None:
                     disaster = DisasterFailure(links_to_fail, nodes_to_fail, at, duration)
-                    self.add_event(Event(disaster.arrival_time, events.disaster_arrival, disaster))
+                    self.add_event(disaster.arrival_time, events.DISASTER_ARRIVAL, disaster)
             self.current_disaster_zone[2] = []
 
             #5%
-            reg_prob = self.rng.randint(1,100)
+            reg_prob = self.cascade_draws[disaster_id][2]
             at += 3600.0
             if reg_prob <= 5 and self.current_disaster_zone[3]!=[]:
                 region_to_fail = self.current_disaster_zone[3].copy()
@@ -847,11 +1035,11 @@ class Environment:
                             link_src_tgt.append(item)
                     links_to_fail.append(link_src_tgt)
 
-                duration = self.rng.expovariate(1/self.mean_failure_duration)
+                duration = self.disaster_durations[disaster_id][3]
                 self.time_aux_for_next_cascade = (at + duration)#juliana
                 if at != None:
                     disaster = DisasterFailure(links_to_fail, nodes_to_fail, at, duration)
-                    self.add_event(Event(disaster.arrival_time, events.disaster_arrival, disaster))
+                    self.add_event(disaster.arrival_time, events.DISASTER_ARRIVAL, disaster)
                     self.time_last_cascade=at+duration
             self.current_disaster_zone[3] = []
 
@@ -908,35 +1096,28 @@ class Environment:
         
         if at != None:
             disaster = DisasterFailure(links_to_fail, nodes_to_fail, at, duration)
-            self.add_event(Event(disaster.arrival_time, events.disaster_arrival, disaster))
+            self.add_event(disaster.arrival_time, events.DISASTER_ARRIVAL, disaster)
         '''
-    def _update_link_stats(self, node1, node2):
+    def _update_link_stats(self, link_ids, units):
         """
         Updates link statistics following a time-weighted manner.
+        Must be called before `units` are allocated (positive) or released (negative) in the links, so that
+        the busy units accumulated since the last update are the ones before the change.
         """
-        last_update = self.topology[node1][node2]['last_update']
-        time_diff = self.current_time - self.topology[node1][node2]['last_update']
-        if self.current_time > 0:
-            last_util = self.topology[node1][node2]['utilization']
-            cur_util = (self.resource_units_per_link - self.topology[node1][node2]['available_units']) / self.resource_units_per_link
-            # utilization is weighted by the time
-            utilization = ((last_util * last_update) + (cur_util * time_diff)) / self.current_time
-            self.topology[node1][node2]['utilization'] = utilization
-        self.topology[node1][node2]['last_update'] = self.current_time
-
-    def _update_node_stats(self, node):
+        busy_units = self.resources.link_total_units[link_ids] - self.resources.link_available_units[link_ids]
+        self.resources.link_busy_time[link_ids] += busy_units * (self.current_time - self.resources.link_last_update[link_ids])
+        self.resources.link_last_update[link_ids] = self.current_time
+        self.resources.link_busy_units += units * len(link_ids)
+
+    def _update_node_stats(self, node_id, units):
         """
         Updates node statistics following a time-weighted manner.
+        Must be called before `units` are allocated (positive) or released (negative) in the node.
         """
-        last_update = self.topology.nodes[node]['last_update']
-        time_diff = self.current_time - self.topology.nodes[node]['last_update']
-        if self.current_time > 0:
-            last_util = self.topology.nodes[node]['utilization']
-            cur_util = (self.topology.nodes[node]['total_units'] - self.topology.nodes[node]['available_units']) / self.topology.nodes[node]['total_units']
-            # utilization is weighted by the time
-            utilization = ((last_util * last_update) + (cur_util * time_diff)) / self.current_time
-            self.topology.nodes[node]['utilization'] = utilization
-        self.topology.nodes[node]['last_update'] = self.current_time
+        busy_units = self.resources.node_total_units[node_id] - self.resources.node_available_units[node_id]
+        self.resources.node_busy_time[node_id] += busy_units * (self.current_time - self.resources.node_last_update[node_id])
+        self.resources.node_last_update[node_id] = self.current_time
+        self.resources.node_busy_units += units
 
     def _update_network_stats(self):
         """
@@ -948,27 +1129,78 @@ class Environment:
         return float(self._rejected_services) / float(self._processed_arrivals)
 
 
-def run_simulation(env: Environment):
+def run_simulation(env: Environment, seeds: Optional[Sequence[int]] = None) -> List[tuple]:
     """
     Launches the simulation for one particular configuration represented by the env object.
+    `seeds` are the indices of the seeds to be simulated, from 0 to `env.num_seeds` - 1 (all of them by default).
+    Returns the results of each seed as tuples (routing policy, restoration policy, load, statistics),
+    so that they can be collected by the process that launched the simulation.
     """
     logger = multiprocessing.log_to_stderr()
     logger.setLevel(logging.INFO)
     logger.info(f'Running simulation for load {env.load} and policy {env.routing_policy.name}')
 
-    for seed in range(env.num_seeds):
-        env.reset(seed=env.seed + seed, id_simulation=seed)  # adds to the general seed
+    records = []
+    base_seed = env.seed
+    for seed in (range(env.num_seeds) if seeds is None else seeds):
+        env.reset(seed=base_seed + seed, id_simulation=seed)  # adds to the general seed
         logger.info(f'Running simulation {seed} for policy {env.routing_policy.name} and load {env.load}')
+        handlers = events.HANDLERS
         while len(env.events) > 0:
-            event_tuple = heapq.heappop(env.events)
-            time = event_tuple[0]
+            time, _, kind, payload = env.events.pop()
+            if kind == events.CANCELLED:
+                continue
             env.current_time = time
-            event = event_tuple[1]
-            event.call(env, event.params)
+            handlers[kind](env, payload)
 
-        env.compute_simulation_stats()
+        if env.service_log is not None:
+            env.service_log.flush()
+        records.append((env.routing_policy.name, env.restoration_policy.name, env.load, env.compute_simulation_stats()))
     # prepare observations
     logger.info(f'Finishing simulation for load {env.load} and policy {env.routing_policy.name}')
+    return records
+
+
+def run_lockstep_simulation(envs: Sequence[Environment], seeds: Optional[Sequence[int]] = None) -> List[tuple]:
+    """
+    Launches the simulations of several environments that differ only in their policies, e.g., one per restoration
+    policy at the same load, in lockstep within one process. The arrivals and the disaster schedule of each seed are
+    generated once and shared by all environments, while each environment keeps its own event queue and resources.
+    At each step, every environment with pending events processes its next event.
+    `seeds` and the results returned follow the same format as in `run_simulation`.
+    """
+    logger = multiprocessing.log_to_stderr()
+    logger.setLevel(logging.INFO)
+    logger.info(f'Running lockstep simulation for load {envs[0].load} and policies {[env.restoration_policy.name for env in envs]}')
+
+    records = []
+    base_seed = envs[0].seed
+    for seed in (range(envs[0].num_seeds) if seeds is None else seeds):
+        if envs[0].crn:
+            trace = traces.load_trace(envs[0].get_trace_file(base_seed + seed))
+        else:
+            trace = envs[0].generate_trace(base_seed + seed)
+        trace = traces.as_lists(trace)  # converted once and shared by all environments
+        for env in envs:
+            env.reset(seed=base_seed + seed, id_simulation=seed, trace=trace)
+        logger.info(f'Running lockstep simulation {seed} for load {envs[0].load}')
+        handlers = events.HANDLERS
+        running = list(envs)
+        while len(running) > 0:
+            for env in running:
+                time, _, kind, payload = env.events.pop()
+                if kind == events.CANCELLED:
+                    continue
+                env.current_time = time
+                handlers[kind](env, payload)
+            running = [env for env in running if len(env.events) > 0]
+
+        for env in envs:
+            if env.service_log is not None:
+                env.service_log.flush()
+            records.append((env.routing_policy.name, env.restoration_policy.name, env.load, env.compute_simulation_stats()))
+    logger.info(f'Finishing lockstep simulation for load {envs[0].load}')
+    return records
 
 @dataclass
 class PriorityClass:
@@ -978,7 +1210,7 @@ class PriorityClass:
     max_degradation: float = 0.0
     max_delay: float = 0.0
 
-@dataclass(eq=False, repr=False)
+@dataclass(eq=False, repr=False, slots=True)
 class Service:
     """"
     Class that defines one service in the system.
@@ -1013,24 +1245,15 @@ class Service:
             return self.service_id == other.service_id
         return False
 
-@dataclass
+@dataclass(slots=True)
 class LinkFailure:
     link_to_fail: Sequence[str]
     arrival_time: float
     duration: float
 
-@dataclass
+@dataclass(slots=True)
 class DisasterFailure:
     links: Sequence[Sequence[str]]
     nodes: Sequence[str]
     arrival_time: float
     duration: float
-    
-@dataclass
-class Event:
-    """
-    Class that models one event of the event queue.
-    """
-    time: float
-    call: Callable
-    params: Any
\ No newline at end of file
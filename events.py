@@ -4,6 +4,15 @@ import typing
 if typing.TYPE_CHECKING:  # avoid circular imports
     from core import Environment, Service, LinkFailure, DisasterFailure
 
+# codes of the kinds of events in the event queue, used to index `HANDLERS`
+CANCELLED = -1  # lazily removed from the event queue
+ARRIVAL = 0
+DEPARTURE = 1
+LINK_FAILURE_ARRIVAL = 2
+LINK_FAILURE_DEPARTURE = 3
+DISASTER_ARRIVAL = 4
+DISASTER_DEPARTURE = 5
+
 
 def arrival(env: 'Environment', service: 'Service') -> None:
     # logging.debug('Processing arrival {} for policy {} load {} seed {}'
@@ -19,47 +28,39 @@ def arrival(env: 'Environment', service: 'Service') -> None:
     env.setup_next_arrival()  # schedules next arrival
 
 def departure(env: 'Environment', service: 'Service') -> None:
+    env.departure_events.pop(service.service_id, None)
     # computing the service time that can be later used to compute availability
-    service.service_time = env.current_time - service.arrival_time
-    service.service_time = service.service_time - service.downtime 
-    service.availability = service.service_time / service.holding_time
+    env.set_service_time(service, env.current_time - service.arrival_time - service.downtime)
     env.release_path(service)
 
 
 def link_failure_arrival(env: 'Environment', failure: 'LinkFailure') -> None:
-    from core import Event
-    
     # saving status
     env.tracked_results['link_failure_arrivals'].append(env.current_time)
     
     # put the link in a failed state
-    env.topology[failure.link_to_fail[0]][failure.link_to_fail[1]]['failed'] = True
+    env.resources.link_failed[env.resources.get_link_id(failure.link_to_fail[0], failure.link_to_fail[1])] = True
 
     # get the list of disrupted services
     services_disrupted: Sequence[Service] = []  # create an empty list
 
     # extend the list with the running services
-    services_disrupted.extend(env.topology[failure.link_to_fail[0]][failure.link_to_fail[1]]['running_services'])
+    services_disrupted.extend(env.resources.get_link_services(failure.link_to_fail[0], failure.link_to_fail[1]))
     number_disrupted_services: int = len(services_disrupted)
 
     env.logger.debug(f'Failure arrived at time: {env.current_time}\tLink: {failure.link_to_fail}\tfor {number_disrupted_services} services')
 
     if len(services_disrupted) > 0:
+        # release all resources used
+        env.release_many(services_disrupted)
+        if env.remove_service_departures(services_disrupted) != len(services_disrupted):
+            env.logger.critical('Event not removed!')
         for service in services_disrupted:
-            # release all resources used
-            env.logger.debug(f'Releasing resources for service {service}')
-            env.release_path(service)
-
-            queue_size = len(env.events)
-            env.remove_service_departure(service)
-            if queue_size -1 != len(env.events):
-                env.logger.critical('Event not removed!')
-
             # set it to a failed state
             service.failed = True
             service.relocated = False
         
-        if len(env.topology[failure.link_to_fail[0]][failure.link_to_fail[1]]['running_services']) != 0:
+        if len(env.resources.link_services[env.resources.get_link_id(failure.link_to_fail[0], failure.link_to_fail[1])]) != 0:
             env.logger.critical('Not all services were removed')
         
         # call the restoration strategy
@@ -96,7 +97,7 @@ def link_failure_arrival(env: 'Environment', failure: 'LinkFailure') -> None:
             txt.write(f"\nTotal restored (relocated): {number_restored_services} ({number_relocated_services})")
             txt.write(f"\nTotal lost: \t\t\t\t{number_lost_services}")
 
-    env.add_event(Event(env.current_time + failure.duration, link_failure_departure, failure))
+    env.add_event(env.current_time + failure.duration, LINK_FAILURE_DEPARTURE, failure)
 
 def link_failure_departure(env: 'Environment', failure: 'LinkFailure') -> None:
     # in this case, only a single link failure is at the network at a given point in time
@@ -106,13 +107,11 @@ def link_failure_departure(env: 'Environment', failure: 'LinkFailure') -> None:
     env.tracked_results['link_failure_departures'].append(env.current_time)
 
     # put the link back in a working state
-    env.topology[failure.link_to_fail[0]][failure.link_to_fail[1]]['failed'] = False
+    env.resources.link_failed[env.resources.get_link_id(failure.link_to_fail[0], failure.link_to_fail[1])] = False
 
     env.setup_next_link_failure()
 
 def disaster_arrival(env: 'Environment', disaster: 'DisasterFailure') -> None:
-    from core import Event
-
     env.tracked_results['link_disaster_arrivals'].append(env.current_time)
     env.logger.debug(f'Disaster arrived at time: {env.current_time}')
 
@@ -125,64 +124,49 @@ def disaster_arrival(env: 'Environment', disaster: 'DisasterFailure') -> None:
     #Deve ser uma lista com todos os servicos falhos no desastre
     # get the list of disrupted services
 
-    # extend the list with the running services
+    # collects the union of the services running over the failed links, in the order they are found link by link
     number_failed_again: int = 0
     number_failed_first: int = 0
     number_adjusted_disrupted_services:int = 0
-    for link_failure in disaster.links:
-        env.logger.debug(f' - Link failed: {link_failure}')
-        env.topology[link_failure[0]][link_failure[1]]['failed'] = True
-        link_failed_services = []
-        link_failed_services.extend(env.topology[link_failure[0]][link_failure[1]]['running_services'])
-        for failed_service in link_failed_services:
-            if failed_service not in services_disrupted:
-                
-                env.logger.debug(f'Releasing resources for service {failed_service}')
-                env.release_path(failed_service)
-                queue_size = len(env.events)
-                env.remove_service_departure(failed_service)
-                if queue_size -1 != len(env.events):
-                    env.logger.critical('Event not removed!')
-                # set it to a failed state
-                failed_service.failed = True
-                failed_service.relocated = False
-                services_disrupted.append(failed_service)
-
-                if failed_service.failed_before:
-                    number_failed_again +=1
-                else:
-                    number_adjusted_disrupted_services+=1
-                    number_failed_first +=1
-                    failed_service.failed_before = True
-
-  
-        
-        if len(env.topology[link_failure[0]][link_failure[1]]['running_services']) != 0:
-            env.logger.critical('Not all services were removed')
+    link_ids = [env.resources.get_link_id(link_failure[0], link_failure[1]) for link_failure in disaster.links]
+    env.logger.debug(f' - Links failed: {disaster.links}')
+    env.resources.link_failed[link_ids] = True
+    failed_services = {}
+    for link_id in link_ids:
+        failed_services.update(env.resources.link_services[link_id])
+    services_disrupted = list(failed_services.values())
+
+    # releases the resources and cancels the departures of all disrupted services at once
+    env.release_many(services_disrupted)
+    if env.remove_service_departures(services_disrupted) != len(services_disrupted):
+        env.logger.critical('Event not removed!')
+    for failed_service in services_disrupted:
+        # set it to a failed state
+        failed_service.failed = True
+        failed_service.relocated = False
+        if failed_service.failed_before:
+            number_failed_again +=1
+        else:
+            number_adjusted_disrupted_services+=1
+            number_failed_first +=1
+            failed_service.failed_before = True
+
+    if any(len(env.resources.link_services[link_id]) != 0 for link_id in link_ids):
+        env.logger.critical('Not all services were removed')
 
-    #A lista deve ser convertida em um conjunto
     number_disrupted_services = len(services_disrupted)
 
+    # services disrupted for the first time get the next disaster id, i.e., their position in `this_disaster_services`
     this_time_disrupted_services: int=0
     for serv in services_disrupted:
-        if serv.service_disaster_id == None:
-            this_time_disrupted_services+=1
+        if serv.service_disaster_id is None:
+            serv.service_disaster_id = len(env.this_disaster_services)
             env.this_disaster_services.append(serv)
-    
-    for idx, serv in enumerate(env.this_disaster_services):
-        for service in services_disrupted:
-            if serv.service_disaster_id==None:
-                service.service_disaster_id = idx
-                serv=service
+            this_time_disrupted_services+=1
 
     # call the restoration strategy
     services_disrupted = env.restoration_policy.restore(services_disrupted)
 
-    for idx, serv in enumerate(env.this_disaster_services):
-        for service in services_disrupted:
-            if service.service_disaster_id == serv.service_disaster_id:
-                serv = service
-
     for serv in env.this_disaster_services:
         if serv.failed == False:
             env.adjusted_restored+=1
@@ -217,10 +201,8 @@ def disaster_arrival(env: 'Environment', disaster: 'DisasterFailure') -> None:
         
         else:    
             # service could not be restored
-            # computing the service time that can be later used to compute availability
-            service.service_time = env.current_time - service.arrival_time
-            # computing the availability <= 1.0
-            service.availability = service.service_time / service.holding_time
+            # computing the service time and the availability <= 1.0
+            env.set_service_time(service, env.current_time - service.arrival_time)
             loss_cost += service.priority_class.loss_cost  
             number_lost_services+=1     
         if(service.route != None):
@@ -276,7 +258,7 @@ def disaster_arrival(env: 'Environment', disaster: 'DisasterFailure') -> None:
         txt.write(f"\nTotal lost: \t\t\t\t{number_lost_services}")
         txt.write(f"\nAECL: \t\t\t\t{env.total_expected_capacity_loss}")
                
-    env.add_event(Event(env.current_time + disaster.duration, disaster_departure, disaster))
+    env.add_event(env.current_time + disaster.duration, DISASTER_DEPARTURE, disaster)
   
 
 def disaster_departure(env: 'Environment', disaster: 'DisasterFailure') -> None:
@@ -293,8 +275,13 @@ def disaster_departure(env: 'Environment', disaster: 'DisasterFailure') -> None:
 
     # put the link back in a working state
     for link in disaster.links:
-        env.topology[link[0]][link[1]]['failed'] = False
-        env.topology[link[0]][link[1]]['link_failure_probability'] = 0
+        link_id = env.resources.get_link_id(link[0], link[1])
+        env.resources.link_failed[link_id] = False
+        env.resources.link_failure_probability[link_id] = 0
 
     for node in disaster.nodes:
-        env.topology.nodes[node]['failed'] = False
\ No newline at end of file
+        env.resources.node_failed[env.resources.node_index[node]] = False
+
+
+# handler of each kind of event, indexed by the event code
+HANDLERS = (arrival, departure, link_failure_arrival, link_failure_departure, disaster_arrival, disaster_departure)
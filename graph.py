@@ -1,8 +1,11 @@
+import hashlib
+import heapq
 from itertools import islice
+from multiprocessing import Pool, shared_memory
 from operator import itemgetter
 import math
-from xml.dom.minidom import parse
-import xml.dom.minidom
+import os
+import pickle
 import networkx as nx
 import numpy as np
 import xml.etree.ElementTree as ET
@@ -13,7 +16,6 @@ def get_k_shortest_paths(graph, source, target, k, weight=None):
     """
     Method from https://networkx.github.io/documentation/stable/reference/algorithms/generated/networkx.algorithms.simple_paths.shortest_simple_paths.html#networkx.algorithms.simple_paths.shortest_simple_paths
     """
-    print("teste ksp")
     return list(islice(nx.shortest_simple_paths(graph, source, target, weight=weight), k))
 
 def get_k_safest_paths(graph, source, target, k, weight=None):
@@ -21,20 +23,223 @@ def get_k_safest_paths(graph, source, target, k, weight=None):
     """
     Method from https://networkx.github.io/documentation/stable/reference/algorithms/generated/networkx.algorithms.simple_paths.shortest_simple_paths.html#networkx.algorithms.simple_paths.shortest_simple_paths
     """
-    print("graph:get_k_safest_paths")
-    print(source, "--", target)
     return list(islice(nx.shortest_simple_paths(graph, source, target, weight='link_failure_probability'), k))
     #return list(islice(nx.shortest_simple_paths(graph, source, target, weight=weight), k))
 
+def get_shortest_path_tree(graph, target, weight=None):
+    """
+    Computes the shortest-path tree towards `target` with Dijkstra's algorithm. Links are bidirectional,
+    therefore the tree is grown from the target.
+    :return: the distance of each node to the target and the next node towards the target
+    """
+    distances = {target: 0}
+    next_nodes = {target: None}
+    visited = set()
+    heap = [(0, 0, target)]
+    counter = 1
+    while heap:
+        distance, _, node = heapq.heappop(heap)
+        if node in visited:
+            continue
+        visited.add(node)
+        for neighbor, attributes in graph[node].items():
+            new_distance = distance + (1 if weight is None else attributes[weight])
+            if neighbor not in distances or new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                next_nodes[neighbor] = node
+                heapq.heappush(heap, (new_distance, counter, neighbor))
+                counter += 1
+    return distances, next_nodes
+
+
+def _get_spur_path(graph, spur_node, target, distances, next_nodes, ignore_nodes, ignore_edges, weight):
+    """
+    Finds the shortest path from `spur_node` to `target` without the nodes and links ignored.
+    The path in the shortest-path tree is used directly when it avoids them. Otherwise, A* is used with the
+    distances of the tree as heuristic, which are exact in the complete graph and therefore never overestimate.
+    :return: the path and its length, or (None, None) if there is no path
+    """
+    path = [spur_node]
+    while path[-1] != target and path[-1] in next_nodes:
+        node = next_nodes[path[-1]]
+        if node in ignore_nodes or (path[-1], node) in ignore_edges or (node, path[-1]) in ignore_edges:
+            break
+        path.append(node)
+    if path[-1] == target:
+        return path, distances[spur_node]
+
+    if spur_node not in distances:
+        return None, None
+    heap = [(distances[spur_node], 0, 0, spur_node)]
+    previous = {spur_node: None}
+    costs = {spur_node: 0}
+    closed = set()
+    counter = 1
+    while heap:
+        _, _, cost, node = heapq.heappop(heap)
+        if node in closed:
+            continue
+        if node == target:
+            path = [node]
+            while previous[path[-1]] is not None:
+                path.append(previous[path[-1]])
+            return path[::-1], cost
+        closed.add(node)
+        for neighbor, attributes in graph[node].items():
+            if neighbor in ignore_nodes or neighbor in closed or neighbor not in distances \
+                    or (node, neighbor) in ignore_edges or (neighbor, node) in ignore_edges:
+                continue
+            new_cost = cost + (1 if weight is None else attributes[weight])
+            if neighbor not in costs or new_cost < costs[neighbor]:
+                costs[neighbor] = new_cost
+                previous[neighbor] = node
+                heapq.heappush(heap, (new_cost + distances[neighbor], counter, new_cost, neighbor))
+                counter += 1
+    return None, None
+
+
+def get_yen_k_shortest_paths(graph, source, target, k, weight=None, tree=None):
+    """
+    Yen's algorithm (J. Y. Yen, "Finding the K Shortest Loopless Paths in a Network", Management Science, 1971),
+    reusing the shortest-path tree towards the target (see `get_shortest_path_tree`) for all spur paths.
+    The tree can be given, so that it is computed once per target for all sources.
+    Paths with the same length may be returned in a different order than by `get_k_shortest_paths`.
+    """
+    if tree is None:
+        tree = get_shortest_path_tree(graph, target, weight)
+    distances, next_nodes = tree
+    first_path, length = _get_spur_path(graph, source, target, distances, next_nodes, set(), set(), weight)
+    if first_path is None:
+        return []
+    paths = [first_path]
+    candidates = []  # heap of (length, counter, path)
+    seen = {tuple(first_path)}
+    counter = 0
+    while len(paths) < k:
+        previous_path = paths[-1]
+        root_length = 0
+        for i in range(len(previous_path) - 1):
+            spur_node = previous_path[i]
+            root = previous_path[:i + 1]
+            ignore_edges = {(path[i], path[i + 1]) for path in paths if len(path) > i + 1 and path[:i + 1] == root}
+            spur_path, spur_length = _get_spur_path(graph, spur_node, target, distances, next_nodes,
+                                                    set(root[:-1]), ignore_edges, weight)
+            if spur_path is not None:
+                path = root[:-1] + spur_path
+                if tuple(path) not in seen:
+                    seen.add(tuple(path))
+                    heapq.heappush(candidates, (root_length + spur_length, counter, path))
+                    counter += 1
+            root_length += 1 if weight is None else graph[spur_node][previous_path[i + 1]][weight]
+        if len(candidates) == 0:
+            break
+        paths.append(heapq.heappop(candidates)[2])
+    return paths
+
+
 def get_path_weight(graph, path, weight):
     return np.sum([graph[path[i]][path[i+1]][weight] for i in range(len(path) - 1)])
 
+def get_link_index(topology):
+    """
+    Maps each pair of nodes to the id of the link connecting them, in both directions.
+    Link ids are the positions of the links in `topology.edges()`.
+    """
+    link_index = {}
+    for idx, (n1, n2) in enumerate(topology.edges()):
+        link_index[n1, n2] = idx
+        link_index[n2, n1] = idx
+    return link_index
+
 class Path:
+    __slots__ = ('node_list', 'length', 'hops', 'link_ids', 'node_ids')
 
-    def __init__(self, node_list, length):
+    def __init__(self, node_list, length, link_ids=None, node_ids=None):
         self.node_list = node_list
         self.length = length
         self.hops = len(node_list) - 1
+        # ids of the links and nodes forming the path, used to index the resource arrays
+        self.link_ids = link_ids
+        self.node_ids = node_ids
+
+
+def build_path(topology, node_list, length, link_index):
+    """
+    Creates a Path with the precomputed link and node ids.
+    """
+    link_ids = np.array([link_index[node_list[i], node_list[i + 1]] for i in range(len(node_list) - 1)], dtype=np.int64)
+    node_ids = np.array([topology.graph['node_indices'].index(node) for node in node_list], dtype=np.int64)
+    return Path(node_list, length, link_ids, node_ids)
+
+
+class CandidatePaths:
+    """
+    Stores the k shortest paths from one source to every DC as padded matrices, so that all
+    (DC, path) candidates can be evaluated at once against the resource arrays.
+    Rows follow the order DC by DC and, for each DC, the order of the k shortest paths.
+    """
+
+    def __init__(self, topology, source, k_shortest_paths):
+        self.dcs = []  # DC of each row
+        self.paths = []  # Path of each row
+        for dc in topology.graph['dcs']:
+            for path in k_shortest_paths[source, dc]:
+                self.dcs.append(dc)
+                self.paths.append(path)
+        self.dc_ids = np.array([topology.graph['node_indices'].index(dc) for dc in self.dcs], dtype=np.int64)
+        self.hops = np.array([path.hops for path in self.paths], dtype=np.int64)
+
+        max_hops = int(self.hops.max()) if len(self.paths) > 0 else 0
+        # padded entries point to link/node 0 and are ignored through the masks
+        self.link_ids = np.zeros((len(self.paths), max_hops), dtype=np.int64)
+        self.link_mask = np.zeros((len(self.paths), max_hops), dtype=bool)
+        self.node_ids = np.zeros((len(self.paths), max_hops + 1), dtype=np.int64)
+        self.node_mask = np.zeros((len(self.paths), max_hops + 1), dtype=bool)
+        for row, path in enumerate(self.paths):
+            self.link_ids[row, :path.hops] = path.link_ids
+            self.link_mask[row, :path.hops] = True
+            self.node_ids[row, :path.hops + 1] = path.node_ids
+            self.node_mask[row, :path.hops + 1] = True
+
+
+def share_topology(topology):
+    """
+    Serializes the topology, including the k shortest paths and the candidate path matrices, into a single shared
+    memory block that can be attached by other processes with `attach_topology`.
+    NumPy arrays are stored out-of-band (pickle protocol 5), so that the processes attaching the block use them
+    in place instead of receiving a copy.
+    The caller owns the block and must close and unlink it once the processes attached to it are finished.
+    :return: the shared memory block and the (offset, size) of the segments stored in it, the first one being
+             the pickled topology and the remaining ones the array buffers
+    """
+    buffers = []
+    data = pickle.dumps(topology, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [data] + [buffer.raw() for buffer in buffers]
+    segments = []
+    size = 0
+    for raw in raw_buffers:
+        size = (size + 63) // 64 * 64  # aligns each segment to 64 bytes
+        segments.append((size, len(raw)))
+        size += len(raw)
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (offset, length), raw in zip(segments, raw_buffers):
+        block.buf[offset:offset + length] = raw
+    return block, segments
+
+
+def attach_topology(name, segments):
+    """
+    Attaches to a block created by `share_topology` and rebuilds the topology.
+    The arrays of the topology are read-only views of the block, therefore the block returned must be kept
+    open while the topology is in use.
+    :return: the topology and the shared memory block
+    """
+    block = shared_memory.SharedMemory(name=name)
+    buffer = block.buf.toreadonly()
+    (offset, length), *buffer_segments = segments
+    topology = pickle.loads(buffer[offset:offset + length],
+                            buffers=[buffer[offset:offset + length] for offset, length in buffer_segments])
+    return topology, block
 
 
 def calculate_geographical_distance(latlong1, latlong2):
@@ -56,44 +261,64 @@ def calculate_geographical_distance(latlong1, latlong2):
 
 
 def read_sndlib_topology(file):
+    """
+    Reads the nodes, links and disaster zones of a topology in SNDlib format with a single parse of the file.
+    The disaster zones are stored in `graph.graph['disaster_zones']` (see `read_disaster_zones`).
+    """
     graph = nx.Graph()
 
-    with open('config/topologies/' + file) as file:
-        tree = xml.dom.minidom.parse(file)
-        document = tree.documentElement
+    root = ET.parse('config/topologies/' + file).getroot()
 
-        graph.graph["coordinatesType"] = document.getElementsByTagName("nodes")[0].getAttribute("coordinatesType")
+    graph.graph["coordinatesType"] = root.find(".//nodes").get("coordinatesType")
 
-        nodes = document.getElementsByTagName("node")
-        for node in nodes:
-            x = node.getElementsByTagName("x")[0]
-            y = node.getElementsByTagName("y")[0]
-            graph.add_node(node.getAttribute("id"), pos=((float(x.childNodes[0].data), float(y.childNodes[0].data))), failed=False)
-        links = document.getElementsByTagName("link")
-        for idx, link in enumerate(links):
-            source = link.getElementsByTagName("source")[0]
-            target = link.getElementsByTagName("target")[0]
+    for node in root.iter("node"):
+        graph.add_node(node.get("id"), pos=(float(node.find(".//x").text), float(node.find(".//y").text)), failed=False)
+    links = {}  # source and target of each link id
+    for idx, link in enumerate(root.iter("link")):
+        source = link.find("source").text
+        target = link.find("target").text
+        links[link.get("id")] = (source, target)
 
-            if graph.graph["coordinatesType"] == "geographical":
-                length = np.around(calculate_geographical_distance(graph.nodes[source.childNodes[0].data]["pos"], graph.nodes[target.childNodes[0].data]["pos"]), 3)
-            else:
-                latlong1 = graph.nodes[source.childNodes[0].data]["pos"]
-                latlong2 = graph.nodes[target.childNodes[0].data]["pos"]
-                length = np.around(math.sqrt((latlong1[0] - latlong2[0]) ** 2 + (latlong1[1] - latlong2[1]) ** 2), 3)
-            
-            weight = 1.0
-            graph.add_edge(source.childNodes[0].data, target.childNodes[0].data,
-                           id=link.getAttribute("id"), weight=weight, length=length, index=idx,
-                           failed=False)
+        if graph.graph["coordinatesType"] == "geographical":
+            length = np.around(calculate_geographical_distance(graph.nodes[source]["pos"], graph.nodes[target]["pos"]), 3)
+        else:
+            latlong1 = graph.nodes[source]["pos"]
+            latlong2 = graph.nodes[target]["pos"]
+            length = np.around(math.sqrt((latlong1[0] - latlong2[0]) ** 2 + (latlong1[1] - latlong2[1]) ** 2), 3)
+
+        weight = 1.0
+        graph.add_edge(source, target, id=link.get("id"), weight=weight, length=length, index=idx, failed=False)
     graph.graph["node_indices"] = []
     for idx, node in enumerate(graph.nodes()):
         graph.graph["node_indices"].append(node)
 
     for idx, lnk in enumerate(graph.edges()):
         graph[lnk[0]][lnk[1]]['link_failure_probability'] = 0
+    graph.graph['disaster_zones'] = read_disaster_zones(root, links)
     return graph
 
 
+def read_disaster_zones(root, links):
+    """
+    Reads the disaster zones of a topology file, using the source and target of each link id in `links`.
+    :return: tuple with the regions of each zone, each region being a tuple of (source, target, probability)
+             for each of its links. The structure is immutable, since it is shared by all simulations.
+    """
+    zones = []
+    for zone in root.iter("zone"):
+        regions = []
+        for region in zone.findall("region"):
+            region_links = []
+            for link in region.findall("disaster_link"):
+                if link.text not in links:
+                    raise ValueError(f'Disaster link `{link.text}` of zone `{zone.get("id")}` is not a link of the topology')
+                source, target = links[link.text]
+                region_links.append((source, target, float(link.get('probability'))))
+            regions.append(tuple(region_links))
+        zones.append(tuple(regions))
+    return tuple(zones)
+
+
 def read_txt_file(file, topology_name):
     graph = nx.Graph(name=topology_name)
     nNodes = 0
@@ -119,6 +344,12 @@ def read_txt_file(file, topology_name):
                 nNodes = int(line)
             elif idx == 2:
                 nLinks = int(line)
+    graph.graph["node_indices"] = []
+    for idx, node in enumerate(graph.nodes()):
+        graph.graph["node_indices"].append(node)
+    for idx, lnk in enumerate(graph.edges()):
+        graph[lnk[0]][lnk[1]]['link_failure_probability'] = 0
+    graph.graph['disaster_zones'] = ()  # the format has no disaster zones
     return graph
 
 
@@ -165,54 +396,158 @@ def get_dcs(args, topology):
         raise ValueError('Selected args.dc_placement not correct!')
 
 
-def get_ksp(args, topology):
-    print("teste passagem ksp")
+# folder where the k shortest paths are cached between runs (see `get_source_dc_paths`)
+KSP_CACHE_FOLDER = 'results/ksp_cache'
+
+
+def get_ksp_cache_file(args, topology, weight):
+    """
+    Returns the file caching the k shortest paths computed with `weight`, named after a hash of the
+    contents of the topology file, the sources and DCs (in order, as the file stores the pairs by position), k,
+    the weight and the algorithm, so that any change in them uses a different file.
+    """
+    with open('config/topologies/' + args.topology_file, 'rb') as file:
+        file_hash = hashlib.sha256(file.read()).hexdigest()
+    algorithm = args.ksp_algorithm if hasattr(args, 'ksp_algorithm') else 'networkx'
+    key = '|'.join([file_hash, ','.join(topology.graph['source_nodes']), ','.join(topology.graph['dcs']),
+                    str(args.k_paths), str(weight), algorithm])
+    return os.path.join(KSP_CACHE_FOLDER, hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '.npz')
+
+
+def save_ksp_cache(file_name, topology, paths):
+    """
+    Stores the paths of each (source, DC) pair as node ids: `nodes` concatenates the paths, `path_offsets`
+    delimits each path within `nodes` and `pair_offsets` delimits the paths of each pair, in the order of
+    `topology.graph['source_nodes']` and `topology.graph['dcs']`, which are stored along with the node names
+    to be checked when loading.
+    """
+    node_indices = {node: idx for idx, node in enumerate(topology.graph['node_indices'])}
+    nodes, path_offsets, pair_offsets = [], [0], [0]
+    for source in topology.graph['source_nodes']:
+        for dc in topology.graph['dcs']:
+            for path in paths[source, dc]:
+                nodes.extend(node_indices[node] for node in path)
+                path_offsets.append(len(nodes))
+            pair_offsets.append(len(path_offsets) - 1)
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    temporary_file_name = f'{file_name}.{os.getpid()}.tmp'
+    with open(temporary_file_name, 'wb') as file:
+        np.savez(file, nodes=np.array(nodes, dtype=np.int32), path_offsets=np.array(path_offsets, dtype=np.int64),
+                 pair_offsets=np.array(pair_offsets, dtype=np.int64),
+                 node_indices=np.array(topology.graph['node_indices']),
+                 source_nodes=np.array(topology.graph['source_nodes']), dcs=np.array(topology.graph['dcs']))
+    os.replace(temporary_file_name, file_name)  # other processes never see a partially written file
+
+
+def load_ksp_cache(file_name, topology):
+    """
+    Loads the paths stored by `save_ksp_cache`.
+    :return: dict with the list of paths (lists of nodes) of each (source, DC) pair, or None if the file does not
+             exist or does not match the nodes, sources and DCs of the topology, in order
+    """
+    if not os.path.isfile(file_name):
+        return None
+    with np.load(file_name) as data:
+        for key in ('node_indices', 'source_nodes', 'dcs'):
+            if key not in data.files or data[key].tolist() != list(topology.graph[key]):
+                return None
+        nodes = [topology.graph['node_indices'][idx] for idx in data['nodes'].tolist()]
+        path_offsets = data['path_offsets'].tolist()
+        pair_offsets = data['pair_offsets'].tolist()
+    paths = {}
+    pair = 0
+    for source in topology.graph['source_nodes']:
+        for dc in topology.graph['dcs']:
+            paths[source, dc] = [nodes[path_offsets[path]:path_offsets[path + 1]]
+                                 for path in range(pair_offsets[pair], pair_offsets[pair + 1])]
+            pair += 1
+    return paths
+
+
+# state of the processes computing paths in parallel (see `get_source_dc_paths`)
+_ksp_worker_state = None
+
+
+def _init_ksp_worker(topology, k, weight, algorithm, trees):
+    global _ksp_worker_state
+    _ksp_worker_state = (topology, k, weight, algorithm, trees)
+
+
+def _compute_pair_paths(pair):
+    topology, k, weight, algorithm, trees = _ksp_worker_state
+    source, dc = pair
+    if algorithm == 'yen':
+        return get_yen_k_shortest_paths(topology, source, dc, k, weight=weight, tree=trees[dc])
+    return get_k_shortest_paths(topology, source, dc, k, weight=weight)
+
+
+def get_source_dc_paths(args, topology, weight):
+    """
+    Computes the k shortest paths from every source to every DC using `weight`, or loads them from the cache
+    (see `get_ksp_cache_file`) unless `args.ksp_cache` is False.
+    The paths are computed with `get_k_shortest_paths`, or with `get_yen_k_shortest_paths` if `args.ksp_algorithm`
+    is 'yen', and the (source, DC) pairs are distributed over `args.threads` processes if more than one.
+    :return: dict with the list of paths (lists of nodes) of each (source, DC) pair
+    """
+    algorithm = args.ksp_algorithm if hasattr(args, 'ksp_algorithm') else 'networkx'
+    threads = args.threads if hasattr(args, 'threads') else 1
+    use_cache = not hasattr(args, 'ksp_cache') or args.ksp_cache
+    if use_cache:
+        cache_file = get_ksp_cache_file(args, topology, weight)
+        paths = load_ksp_cache(cache_file, topology)
+        if paths is not None:
+            return paths
+
+    pairs = [(source, dc) for source in topology.graph['source_nodes'] for dc in topology.graph['dcs']]
+    trees = None
+    if algorithm == 'yen':  # one tree per DC, shared by all sources
+        trees = {dc: get_shortest_path_tree(topology, dc, weight) for dc in topology.graph['dcs']}
+    initargs = (topology, args.k_paths, weight, algorithm, trees)
+    if threads > 1:
+        with Pool(processes=threads, initializer=_init_ksp_worker, initargs=initargs) as p:
+            pair_paths = p.map(_compute_pair_paths, pairs, chunksize=max(1, len(pairs) // (4 * threads)))
+    else:
+        _init_ksp_worker(*initargs)
+        pair_paths = [_compute_pair_paths(pair) for pair in pairs]
+    paths = dict(zip(pairs, pair_paths))
+
+    if use_cache:
+        save_ksp_cache(cache_file, topology, paths)
+    return paths
+
+
+def build_ksp(topology, paths, weight):
+    """
+    Creates the Path objects of each (source, DC) pair, with the length of the paths measured by `weight`.
+    """
     k_shortest_paths = {}
+    link_index = get_link_index(topology)
+    for (source, dc), node_lists in paths.items():
+        objs = [build_path(topology, path, get_path_weight(topology, path, weight), link_index) for path in node_lists]
+        # both directions have the same paths, i.e., bidirectional symmetrical links
+        k_shortest_paths[source, dc] = objs
+        k_shortest_paths[dc, source] = objs
+    return k_shortest_paths
+
 
-    for idn1, n1 in enumerate(topology.graph['source_nodes']):
-        for idn2, n2 in enumerate(topology.graph['dcs']):
-            paths = get_k_shortest_paths(topology, n1, n2, args.k_paths)
-            lengths = [get_path_weight(topology, path, 'length') for path in paths]
-            objs = []
-            for path, length in zip(paths, lengths):
-                objs.append(Path(path, length))
-            # both directions have the same paths, i.e., bidirectional symmetrical links
-            k_shortest_paths[n1, n2] = objs
-            k_shortest_paths[n2, n1] = objs
+def get_ksp(args, topology):
+    k_shortest_paths = build_ksp(topology, get_source_dc_paths(args, topology, None), 'length')
     topology.graph['ksp'] = k_shortest_paths
+    topology.graph['candidates'] = {source: CandidatePaths(topology, source, k_shortest_paths)
+                                    for source in topology.graph['source_nodes']}
     return topology
 
 def get_probability_ksp(args, topology):
-    print("passa ")
-    k_shortest_paths = {}
-    
-    for idn1, n1 in enumerate(topology.graph['source_nodes']):
-        for idn2, n2 in enumerate(topology.graph['dcs']):
-            print("chama === ",args.k_paths)
-            paths = get_k_safest_paths(topology, n1, n2, args.k_paths)
-            print("retorna s_safest")
-            lengths = [get_path_weight(topology, path, 'link_failure_probability') for path in paths]
-            objs = []
-            for path, length in zip(paths, lengths):
-                objs.append(Path(path, length))
-            # both directions have the same paths, i.e., bidirectional symmetrical links
-            k_shortest_paths[n1, n2] = objs
-            k_shortest_paths[n2, n1] = objs
-    topology.graph['prob_ksp'] = k_shortest_paths
+    paths = get_source_dc_paths(args, topology, 'link_failure_probability')
+    topology.graph['prob_ksp'] = build_ksp(topology, paths, 'link_failure_probability')
     return topology
 
 def set_failure_probabilities(args,topology):
-    tf: str = args.topology_file
-    tfpath = "config/topologies/"+tf
-    elementTree = ET.parse(tfpath)
-    root = elementTree.getroot()
-
-    for zone in root.findall(".//zone"):
-        for region in root.findall(".//zone[@id='"+zone.attrib['id']+"']/region"):
-            for link in root.findall(".//zone[@id='"+zone.attrib['id']+"']/region[@id='"+region.attrib['id']+"']/disaster_link"):
-                for src in root.findall(".//link[@id='"+link.text+"']/source"):
-                    link_src = src.text
-                for tgt in root.findall(".//link[@id='"+link.text+"']/target"):
-                    link_tgt = tgt.text
-                topology[link_src][link_tgt]['link_failure_probability'] = float(link.attrib['probability'])
-    return topology
\ No newline at end of file
+    """
+    Sets the failure probability of the links in the disaster zones of the topology.
+    """
+    for zone in topology.graph['disaster_zones']:
+        for region in zone:
+            for link_src, link_tgt, probability in region:
+                topology[link_src][link_tgt]['link_failure_probability'] = probability
+    return topology
@@ -141,7 +141,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
 
                 plt.semilogy([load for load in results[routing_policy][restoration_policy].keys()],
                 [np.mean([results[routing_policy][restoration_policy][load][x]['request_blocking_ratio'] for x in range(len(results[routing_policy][restoration_policy][load]))])
-                for load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                for load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang] \n(a)')
     plt.ylabel('Req. blocking ratio') 
     plt.legend(loc=2)
@@ -154,7 +154,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 has_data = True
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                     [np.mean([results[routing_policy][restoration_policy][load][x]['average_link_usage'] for x in range(len(results[routing_policy][restoration_policy][load]))]) for
-                    load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                    load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. link usage')
     # if has_data:
@@ -171,7 +171,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['average_availability'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. availability')
 
@@ -188,7 +188,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['average_restorability'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. restorability(%)')
     '''
@@ -205,7 +205,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['average_relocation'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang] \n (b)')
     plt.ylabel('Avg. relocation')
     '''
@@ -222,7 +222,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['avg_expected_capacity_loss'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. expected capacity loss')
     
@@ -237,7 +237,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['avg_loss_cost'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. loss cost')
     
@@ -251,7 +251,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['avg_expected_loss_cost'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. expected loss cost')
     '''
@@ -265,7 +265,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['avg_hops_restaured_services'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang] \n(f)')
     plt.ylabel('Avg. hops in restoration paths')
 
@@ -280,7 +280,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['services_restored'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Number_restored_services')
     '''
@@ -294,7 +294,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['avg_services_affected'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang] \n(b)')
     plt.ylabel('Avg. number of service disruptions')
 
@@ -311,7 +311,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['average_restorability'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang] \n(e)')
     plt.ylabel('Avg. restorability')
     plt.subplot(2, 3, 4)
@@ -327,7 +327,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['average_availability'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang] \n(d)')
     plt.ylabel('Avg. availability')
     
@@ -341,7 +341,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['avg_failed_before_services'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
 
     plt.xlabel('Load [Erlang] \n(c)')
     plt.ylabel('Avg. number of re-disruptions')
@@ -351,7 +351,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
     has_data = False
     for id_routing_policy, routing_policy in enumerate(results.keys()):
         for id_restoration_policy, restoration_policy in enumerate(results[routing_policy].keys()):
-            plt.plot(0,label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+            plt.plot(0,label=f"{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.axis('off')
     plt.legend(loc=2)
     '''
@@ -369,7 +369,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['adjusted_restorability'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. adjusted_restorability')
     
@@ -386,7 +386,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['total_failed_epi'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. total_failed_epi')
     plt.subplot(5, 4, 13)
@@ -402,7 +402,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['total_restored_epi'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. total_restored_epi')
 
@@ -419,7 +419,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['total_failed_73'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. total_failed_73')
     plt.subplot(5, 4, 15)
@@ -435,7 +435,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['total_restored_73'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. total_restored_73')
     plt.subplot(5, 4, 16)
@@ -451,7 +451,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['total_failed_15'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. total_failed_15')
     plt.subplot(5, 4, 17)
@@ -467,7 +467,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['total_restored_15'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. total_restored_15')
     plt.subplot(5, 4, 18)
@@ -483,7 +483,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['total_failed_5'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. total_failed_5')
     plt.subplot(5, 4, 19)
@@ -499,7 +499,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['total_restored_5'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
                                 load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", 
-                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. total_restored_5')
     '''
@@ -515,7 +515,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['avg_hops_restaured_services'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. hops_restaured_services')
 
@@ -529,7 +529,7 @@ def plot_final_results(env: 'Environment', results: dict, start_time: datetime.d
                 plt.plot([load for load in results[routing_policy][restoration_policy].keys()],
                                 [np.mean([results[routing_policy][restoration_policy][load][x]['avg_hops_relocated_services'] for x in
                                         range(len(results[routing_policy][restoration_policy][load]))]) for
-                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy])
+                                load in results[routing_policy][restoration_policy].keys()], label=f"{routing_policy}/{restoration_policy}", marker=markers[id_routing_policy], ls=line_styles[id_restoration_policy % len(line_styles)])
     plt.xlabel('Load [Erlang]')
     plt.ylabel('Avg. hops_relocated_services')
     '''
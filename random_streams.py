@@ -0,0 +1,36 @@
+import zlib
+import numpy as np
+
+
+def get_name_key(name: str) -> int:
+    """
+    Converts a name, e.g., of a policy, into an integer that can be used as entropy of a seed sequence.
+    Python's `hash` is not used since it is randomized for strings between processes.
+    """
+    return zlib.crc32(name.encode('utf-8'))
+
+
+class RandomStreams:
+    """
+    Independent random number streams for each component of the simulation, derived with `numpy.random.SeedSequence`.
+    The workload streams (arrivals, holding times, sources, sizes, disasters and link failures) depend only on (seed, load), so that
+    all policies simulated with the same seed and load face exactly the same traffic and disasters.
+    The routing stream, used to break ties in the routing policies, also depends on the routing and restoration
+    policies. Therefore, a run is reproducible from (seed, load, routing policy, restoration policy) alone,
+    regardless of the process running it or the other runs executed before.
+    """
+
+    def __init__(self, seed: int, load: float, routing_policy: str, restoration_policy: str):
+        load_key = int(round(load * 1000))  # load in milli-Erlangs
+        workload = np.random.SeedSequence([seed, load_key])
+        arrivals, holding_times, sources, sizes, disasters, link_failures = workload.spawn(6)
+        self.arrivals: np.random.Generator = np.random.default_rng(arrivals)
+        self.holding_times: np.random.Generator = np.random.default_rng(holding_times)
+        self.sources: np.random.Generator = np.random.default_rng(sources)
+        self.sizes: np.random.Generator = np.random.default_rng(sizes)
+        self.disasters: np.random.Generator = np.random.default_rng(disasters)
+        # seed of the `random.Random` instance used to generate the link failures (`Environment.rng`)
+        self.link_failures_seed: int = int(link_failures.generate_state(1, np.uint64)[0])
+
+        policy = np.random.SeedSequence([seed, load_key, get_name_key(routing_policy), get_name_key(restoration_policy)])
+        self.routing: np.random.Generator = np.random.default_rng(policy)
@@ -0,0 +1,90 @@
+import typing
+from typing import List
+import numpy as np
+from graph import get_link_index
+if typing.TYPE_CHECKING:
+    from networkx import Graph
+
+
+class ResourceState:
+    """
+    Class that holds the mutable state of the network resources as NumPy arrays.
+    Links are indexed by the `id` assigned to each edge in `Environment.reset`, i.e., their position in
+    `topology.edges()`, and nodes by their position in `topology.graph['node_indices']`.
+    The topology graph is only used to build the indices and is not modified.
+    """
+
+    def __init__(self, topology: 'Graph', resource_units_per_link: int, resource_units_per_dc: int):
+        self.link_index: dict = get_link_index(topology)  # (node1, node2) -> link id, in both directions
+        self.node_index: dict = {node: idx for idx, node in enumerate(topology.graph['node_indices'])}
+        self.dc_ids: np.ndarray = np.array([self.node_index[dc] for dc in topology.graph['dcs']], dtype=np.int64)
+
+        num_links = topology.number_of_edges()
+        self.link_total_units: np.ndarray = np.full(num_links, resource_units_per_link, dtype=np.int64)
+        self.link_available_units: np.ndarray = self.link_total_units.copy()
+        self.link_failed: np.ndarray = np.zeros(num_links, dtype=bool)
+        self.link_failure_probability: np.ndarray = np.zeros(num_links)
+        self.link_current_failure_probability: np.ndarray = np.zeros(num_links)
+        # integral of the busy units over time, accumulated only when the units of a link change
+        self.link_busy_time: np.ndarray = np.zeros(num_links)
+        self.link_last_update: np.ndarray = np.zeros(num_links)
+        self.link_busy_units: int = 0  # busy units summed over all links
+        self.link_units: int = int(np.sum(self.link_total_units))  # total units summed over all links
+        # services running over each link, indexed by service id in the order they were provisioned
+        self.link_services: List[dict] = [{} for _ in range(num_links)]
+        # number of times a service was provisioned over each link, including restorations
+        self.link_assigned_services: np.ndarray = np.zeros(num_links, dtype=np.int64)
+
+        num_nodes = len(self.node_index)
+        self.node_total_units: np.ndarray = np.zeros(num_nodes, dtype=np.int64)
+        self.node_total_units[self.dc_ids] = resource_units_per_dc
+        self.node_available_units: np.ndarray = self.node_total_units.copy()
+        self.node_failed: np.ndarray = np.zeros(num_nodes, dtype=bool)
+        self.node_busy_time: np.ndarray = np.zeros(num_nodes)
+        self.node_last_update: np.ndarray = np.zeros(num_nodes)
+        self.node_busy_units: int = 0  # busy units summed over all DCs
+        self.node_units: int = int(np.sum(self.node_total_units))  # total units summed over all DCs
+        # services running at each node (only DCs host services), indexed by service id
+        self.node_services: List[dict] = [{} for _ in range(num_nodes)]
+        self.node_assigned_services: np.ndarray = np.zeros(num_nodes, dtype=np.int64)
+
+    def get_link_id(self, node1: str, node2: str) -> int:
+        return self.link_index[node1, node2]
+
+    def get_link_services(self, node1: str, node2: str) -> list:
+        """
+        Returns the services running over the link, in the order they were provisioned.
+        """
+        return list(self.link_services[self.link_index[node1, node2]].values())
+
+    def get_average_link_usage(self) -> float:
+        """
+        Returns the current usage averaged over all links in O(1).
+        Since all links have the same number of units, this equals the mean of the individual usages.
+        """
+        return self.link_busy_units / self.link_units
+
+    def get_average_node_usage(self) -> float:
+        """
+        Returns the current usage averaged over all DCs in O(1).
+        Since all DCs have the same number of units, this equals the mean of the individual usages.
+        """
+        return self.node_busy_units / self.node_units
+
+    def get_link_utilization(self, time: float) -> np.ndarray:
+        """
+        Returns the time-weighted utilization of each link from the beginning of the simulation until `time`.
+        """
+        busy_units = self.link_total_units - self.link_available_units
+        busy_time = self.link_busy_time + busy_units * (time - self.link_last_update)
+        return busy_time / (self.link_total_units * time) if time > 0 else np.zeros(len(self.link_total_units))
+
+    def get_node_utilization(self, time: float) -> np.ndarray:
+        """
+        Returns the time-weighted utilization of each DC from the beginning of the simulation until `time`,
+        in the same order as `dc_ids`.
+        """
+        dc_ids = self.dc_ids
+        busy_units = self.node_total_units[dc_ids] - self.node_available_units[dc_ids]
+        busy_time = self.node_busy_time[dc_ids] + busy_units * (time - self.node_last_update[dc_ids])
+        return busy_time / (self.node_total_units[dc_ids] * time) if time > 0 else np.zeros(len(dc_ids))
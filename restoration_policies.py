@@ -1,11 +1,13 @@
 import abc
+import heapq
+import importlib.util
 import typing
 from typing import Optional, Sequence
 import numpy as np
 if typing.TYPE_CHECKING:
     from core import Service
     from core import Environment
-    from graph import Path
+    from graph import CandidatePaths, Path
 from typing import Tuple
 from networkx import Graph
 
@@ -50,8 +52,7 @@ class RestorationPolicy(abc.ABC):
         Args:
             service (Service): The service to be dropped.
         """
-        service.service_time = self.env.current_time - service.arrival_time
-        service.availability = service.service_time / service.holding_time
+        self.env.set_service_time(service, self.env.current_time - service.arrival_time)
 
 class DoNotRestorePolicy(RestorationPolicy):
     def __init__(self) -> None:
@@ -82,7 +83,7 @@ class PathRestorationPolicy(RestorationPolicy):
         """
         
         # tries to get a path
-        path: Optional['Path'] = routing_policies.get_shortest_path(self.env.topology, service)
+        path: Optional['Path'] = routing_policies.get_shortest_path(self.env, service)
 
         # if a path was found, sets it and returns true
         if path is not None:
@@ -137,7 +138,7 @@ class PathRestorationPolicy(RestorationPolicy):
                 service.failed = False
                 restored_services += 1
                 self.env.provision_service(service)
-                service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
             else:  # no alternative was found
                 self.drop_service(service)
         return services
@@ -222,14 +223,14 @@ class PathRestorationWithRelocationPolicy(PathRestorationPolicy):
                     service.failed = False
                     restored_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 elif self.relocate_restore_path(service):
                     service.failed = False
                     service.relocated = True
                     restored_services += 1
                     relocated_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 else:  # no alternative was found
                     self.drop_service(service)
             else:  # no alternative was found
@@ -261,9 +262,9 @@ class PathRestorationPropabilitiesAware(RestorationPolicy):
         #print("chama safest")
         # tries to get a path
         #print("entrada>>get_safest_path")
-        path: Optional['Path'] = routing_policies.get_safest_path(self.env.topology, service) 
+        path: Optional['Path'] = routing_policies.get_safest_path(self.env, service) 
         #print("get_safest_path>>saida")
-        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env.topology, service)#(juliana alteracao)
+        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env, service)#(juliana alteracao)
         #print("returned by safest: ")
         # if a path was found, sets it and returns true
         if path is not None:
@@ -286,7 +287,7 @@ class PathRestorationPropabilitiesAware(RestorationPolicy):
         Returns:
             _type_: _description_
         """
-        success, dc, path = routing_policies.get_safest_dc(self.env.topology, service)#duvida: onde?
+        success, dc, path = routing_policies.get_safest_dc(self.env, service)#duvida: onde?
         if success:
             service.route = path
             print("Realocou")
@@ -340,14 +341,14 @@ class PathRestorationPropabilitiesAware(RestorationPolicy):
                     service.failed = False
                     restored_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 elif self.relocate_restore_path(service):
                     service.failed = False
                     service.relocated = True
                     restored_services += 1
                     relocated_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 else:  # no alternative was found
                     self.drop_service(service)
             else:  # no alternative was found
@@ -374,9 +375,9 @@ class PathRestorationBalancedPropabilitiesAware(RestorationPolicy):
         #print("chama safest")
         # tries to get a path
         #print("entrada>>get_safest_path")
-        path: Optional['Path'] = routing_policies.get_balanced_sasfest_path(self.env.topology, service) 
+        path: Optional['Path'] = routing_policies.get_balanced_sasfest_path(self.env, service) 
         #print("get_safest_path>>saida")
-        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env.topology, service)#(juliana alteracao)
+        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env, service)#(juliana alteracao)
         #print("returned by safest: ")
         # if a path was found, sets it and returns true
         if path is not None:
@@ -399,7 +400,7 @@ class PathRestorationBalancedPropabilitiesAware(RestorationPolicy):
         Returns:
             _type_: _description_
         """
-        success, dc, path = routing_policies.get_balanced_safest_dc(self.env.topology, service)#duvida: onde?
+        success, dc, path = routing_policies.get_balanced_safest_dc(self.env, service)#duvida: onde?
         if success:
             service.route = path
             print("Realocou")
@@ -423,14 +424,14 @@ class PathRestorationBalancedPropabilitiesAware(RestorationPolicy):
                     service.failed = False
                     restored_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 elif self.relocate_restore_path(service):
                     service.failed = False
                     service.relocated = True
                     restored_services += 1
                     relocated_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 else:  # no alternative was found
                     self.drop_service(service)
             else:  # no alternative was found
@@ -457,9 +458,9 @@ class PathRestorationBalancedPropabilitiesAware04(RestorationPolicy):
         #print("chama safest")
         # tries to get a path
         #print("entrada>>get_safest_path")
-        path: Optional['Path'] = routing_policies.get_path_alfa_04(self.env.topology, service) 
+        path: Optional['Path'] = routing_policies.get_path_alfa_04(self.env, service) 
         #print("get_safest_path>>saida")
-        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env.topology, service)#(juliana alteracao)
+        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env, service)#(juliana alteracao)
         #print("returned by safest: ")
         # if a path was found, sets it and returns true
         if path is not None:
@@ -482,7 +483,7 @@ class PathRestorationBalancedPropabilitiesAware04(RestorationPolicy):
         Returns:
             _type_: _description_
         """
-        success, dc, path = routing_policies.get_dc_alfa_04(self.env.topology, service)#duvida: onde?
+        success, dc, path = routing_policies.get_dc_alfa_04(self.env, service)#duvida: onde?
         if success:
             service.route = path
             print("Realocou")
@@ -506,14 +507,14 @@ class PathRestorationBalancedPropabilitiesAware04(RestorationPolicy):
                     service.failed = False
                     restored_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 elif self.relocate_restore_path(service):
                     service.failed = False
                     service.relocated = True
                     restored_services += 1
                     relocated_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 else:  # no alternative was found
                     self.drop_service(service)
             else:  # no alternative was found
@@ -540,9 +541,9 @@ class PathRestorationBalancedPropabilitiesAware03(RestorationPolicy):
         #print("chama safest")
         # tries to get a path
         #print("entrada>>get_safest_path")
-        path: Optional['Path'] = routing_policies.get_path_alfa_03(self.env.topology, service) 
+        path: Optional['Path'] = routing_policies.get_path_alfa_03(self.env, service) 
         #print("get_safest_path>>saida")
-        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env.topology, service)#(juliana alteracao)
+        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env, service)#(juliana alteracao)
         #print("returned by safest: ")
         # if a path was found, sets it and returns true
         if path is not None:
@@ -565,7 +566,7 @@ class PathRestorationBalancedPropabilitiesAware03(RestorationPolicy):
         Returns:
             _type_: _description_
         """
-        success, dc, path = routing_policies.get_dc_alfa_03(self.env.topology, service)#duvida: onde?
+        success, dc, path = routing_policies.get_dc_alfa_03(self.env, service)#duvida: onde?
         if success:
             service.route = path
             print("Realocou")
@@ -589,14 +590,14 @@ class PathRestorationBalancedPropabilitiesAware03(RestorationPolicy):
                     service.failed = False
                     restored_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 elif self.relocate_restore_path(service):
                     service.failed = False
                     service.relocated = True
                     restored_services += 1
                     relocated_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 else:  # no alternative was found
                     self.drop_service(service)
             else:  # no alternative was found
@@ -623,9 +624,9 @@ class PathRestorationBalancedPropabilitiesAware01(RestorationPolicy):
         #print("chama safest")
         # tries to get a path
         #print("entrada>>get_safest_path")
-        path: Optional['Path'] = routing_policies.get_path_alfa_01(self.env.topology, service) 
+        path: Optional['Path'] = routing_policies.get_path_alfa_01(self.env, service) 
         #print("get_safest_path>>saida")
-        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env.topology, service)#(juliana alteracao)
+        #path: Optional['Path'] = routing_policies.get_shortest_path(self.env, service)#(juliana alteracao)
         #print("returned by safest: ")
         # if a path was found, sets it and returns true
         if path is not None:
@@ -648,7 +649,7 @@ class PathRestorationBalancedPropabilitiesAware01(RestorationPolicy):
         Returns:
             _type_: _description_
         """
-        success, dc, path = routing_policies.get_dc_alfa_01(self.env.topology, service)#duvida: onde?
+        success, dc, path = routing_policies.get_dc_alfa_01(self.env, service)#duvida: onde?
         if success:
             service.route = path
             print("Realocou")
@@ -672,16 +673,240 @@ class PathRestorationBalancedPropabilitiesAware01(RestorationPolicy):
                     service.failed = False
                     restored_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 elif self.relocate_restore_path(service):
                     service.failed = False
                     service.relocated = True
                     restored_services += 1
                     relocated_services += 1
                     self.env.provision_service(service)
-                    service.expected_risk = routing_policies.get_path_risk(self.env.topology, service.route)
+                    service.expected_risk = routing_policies.get_path_risk(self.env.resources, service.route)
                 else:  # no alternative was found
                     self.drop_service(service)
             else:  # no alternative was found
                 self.drop_service(service)
-        return services
\ No newline at end of file
+        return services
+
+
+class BatchRestorationPolicy(RestorationPolicy):
+    """
+    Restores all the services disrupted by a failure as one batch.
+    The (DC, path) candidates of each service are evaluated once against the residual capacities left after the
+    failure, scored with the same trade-off between hops and failure probability as the PRPA policies, and the
+    services are assigned either greedily, most constrained service first, or with a MILP that maximizes the number
+    of restored services (requires SciPy >= 1.9).
+    Paths to the DC the service was using are preferred over relocations. The decisions are provisioned at once.
+    """
+
+    def __init__(self, alpha: float = 0.5, solver: str = 'greedy') -> None:
+        super().__init__()
+        if solver not in ('greedy', 'milp'):
+            raise ValueError(f'Solver should be greedy or milp, got {solver}')
+        if solver == 'milp' and (importlib.util.find_spec('scipy') is None
+                                 or not hasattr(importlib.import_module('scipy.optimize'), 'milp')):
+            raise ImportError('The milp solver of the batch restoration requires SciPy >= 1.9')
+        self.alpha: float = alpha
+        self.solver: str = solver
+        self.name = f'BR(α={alpha})' if solver == 'greedy' else f'BR-MILP(α={alpha})'
+
+    def get_candidates_cost(self, candidates: 'CandidatePaths', max_hops: int) -> np.ndarray:
+        """
+        Obtains the cost of each candidate as (1 - alpha) * hops / max hops + alpha * highest failure probability.
+        The max hops is taken among the candidates of all sources, so that the costs of services from different
+        sources can be compared.
+        """
+        probabilities = np.where(candidates.link_mask,
+                                 self.env.resources.link_current_failure_probability[candidates.link_ids], 0.)
+        return (1 - self.alpha) * candidates.hops / max_hops + self.alpha * probabilities.max(axis=1)
+
+    def restore(self, services: Sequence['Service']):
+        resources = self.env.resources
+        services = sorted(services, key=lambda x: (x.holding_time - (self.env.current_time - x.arrival_time)), reverse=True)
+
+        # failed links and nodes get a negative residual, so that no candidate traversing them fits
+        link_residual = np.where(resources.link_failed, -1, resources.link_available_units)
+        node_residual = np.where(resources.node_failed, -1, resources.node_available_units)
+
+        batch = self.get_batch_candidates(services, link_residual, node_residual)
+        decisions = None
+        if self.solver == 'milp' and len(batch['owner']) > 0:
+            decisions = self.solve_milp(batch, len(services), link_residual, node_residual)
+        if decisions is None:
+            decisions = self.solve_greedy(batch, len(services), link_residual, node_residual)
+
+        assignments = []
+        for entry in decisions:
+            service = services[batch['owner'][entry]]
+            service.failed = False
+            service.relocated = bool(batch['relocation'][entry])
+            assignments.append((service, batch['paths'][entry]))
+        self.env.provision_many(assignments)
+        for service, path in assignments:
+            service.expected_risk = routing_policies.get_path_risk(resources, path)
+
+        for service in services:
+            if service.failed:
+                self.drop_service(service)
+        self.env.logger.debug(f'{self.name} restored {len(assignments)} out of {len(services)} services')
+        return services
+
+    def get_batch_candidates(self, services: Sequence['Service'], link_residual: np.ndarray,
+                             node_residual: np.ndarray) -> dict:
+        """
+        Stacks the (DC, path) candidates of all services that fit in the residual capacities, evaluated at once for
+        the services of each source. Services with a remaining time of 1800 seconds or less are not restored.
+        The candidates of each service are contiguous and in its order of preference: the DC it was using first,
+        then by cost, then by row of its `CandidatePaths`.
+        :return: dict of arrays with one entry per candidate: `owner` (index of the service in `services`),
+                 `dc_ids`, `link_ids` and `link_mask` (padded as in `CandidatePaths`), `computing_units`,
+                 `network_units`, `relocation`, `cost` and `paths`
+        """
+        resources = self.env.resources
+        max_hops = max(int(candidates.hops.max()) for candidates in self.env.topology.graph['candidates'].values())
+        sources = {}
+        for index, service in enumerate(services):
+            if (service.holding_time - (self.env.current_time - service.arrival_time)) > 1800.0:
+                sources.setdefault(service.source, []).append(index)
+
+        parts = []
+        for source, indices in sources.items():
+            candidates = self.env.topology.graph['candidates'][source]
+            indices = np.array(indices)
+            computing_units = np.array([services[index].computing_units for index in indices])
+            network_units = np.array([services[index].network_units for index in indices])
+            destination_ids = np.array([services[index].destination_id for index in indices])
+            available = np.where(candidates.link_mask, link_residual[candidates.link_ids], np.iinfo(np.int64).max).min(axis=1)
+            failed_nodes = (resources.node_failed[candidates.node_ids] & candidates.node_mask).any(axis=1)
+            fit = (node_residual[candidates.dc_ids][None, :] >= computing_units[:, None]) \
+                & (available[None, :] >= network_units[:, None]) & ~failed_nodes[None, :]
+            service_positions, rows = np.nonzero(fit)
+            link_ids = np.zeros((len(rows), max_hops), dtype=np.int64)
+            link_mask = np.zeros((len(rows), max_hops), dtype=bool)
+            link_ids[:, :candidates.link_ids.shape[1]] = candidates.link_ids[rows]
+            link_mask[:, :candidates.link_ids.shape[1]] = candidates.link_mask[rows]
+            parts.append({
+                'owner': indices[service_positions],
+                'rows': rows,
+                'dc_ids': candidates.dc_ids[rows],
+                'link_ids': link_ids,
+                'link_mask': link_mask,
+                'computing_units': computing_units[service_positions],
+                'network_units': network_units[service_positions],
+                'relocation': candidates.dc_ids[rows] != destination_ids[service_positions],
+                'cost': self.get_candidates_cost(candidates, max_hops)[rows],
+                'paths': [candidates.paths[row] for row in rows.tolist()],
+            })
+        if len(parts) == 0:
+            return {'owner': np.zeros(0, dtype=np.int64)}
+
+        batch = {key: np.concatenate([part[key] for part in parts]) for key in parts[0] if key != 'paths'}
+        paths = [path for part in parts for path in part['paths']]
+        order = np.lexsort((batch['rows'], batch['cost'], batch['relocation'], batch['owner']))
+        batch = {key: value[order] for key, value in batch.items()}
+        batch['paths'] = [paths[entry] for entry in order.tolist()]
+        return batch
+
+    def solve_greedy(self, batch: dict, num_services: int, link_residual: np.ndarray, node_residual: np.ndarray):
+        """
+        Assigns the services one at a time: the service with the fewest candidates that still fit in the residual
+        capacities shared by all services goes first (ties broken by remaining time), as it is the most likely to
+        be blocked, and takes its preferred candidate among the ones that fit.
+        The services are kept in a priority queue keyed by their number of candidates that fit. The candidates
+        using each link and each DC are indexed by their demand, in increasing order, so that after an assignment
+        only the ones whose demand now exceeds the residual capacity of the link or DC used are visited. The
+        services that lost candidates are pushed again with their new count; older entries are skipped when popped.
+        :return: list of the candidates assigned, as positions in `batch`
+        """
+        owner = batch['owner']
+        if len(owner) == 0:
+            return []
+        link_residual = link_residual.copy()
+        node_residual = node_residual.copy()
+        dc_ids, link_ids, link_mask = batch['dc_ids'], batch['link_ids'], batch['link_mask']
+        computing_units, network_units = batch['computing_units'], batch['network_units']
+
+        # candidates using each link and each DC by increasing demand, delimited by the offsets; the ones
+        # from the cut of each element onwards no longer fit in its residual capacity
+        entries = np.nonzero(link_mask)[0]
+        order = np.lexsort((network_units[entries], link_ids[link_mask]))
+        link_entries = entries[order]
+        link_demands = network_units[link_entries]
+        link_offsets = np.searchsorted(link_ids[link_mask][order], np.arange(len(link_residual) + 1))
+        link_cuts = link_offsets[1:].copy()
+        dc_entries = np.lexsort((computing_units, dc_ids))
+        dc_demands = computing_units[dc_entries]
+        dc_offsets = np.searchsorted(dc_ids[dc_entries], np.arange(len(node_residual) + 1))
+        dc_cuts = dc_offsets[1:].copy()
+
+        first = np.searchsorted(owner, np.arange(num_services))  # candidates of each service, contiguous
+        last = np.searchsorted(owner, np.arange(num_services), side='right')
+        counts = last - first
+        fits = np.ones(len(owner), dtype=bool)
+        queue = [(count, index) for index, count in enumerate(counts.tolist()) if count > 0]
+        heapq.heapify(queue)
+
+        decisions = []
+        while len(queue) > 0:
+            count, index = heapq.heappop(queue)
+            if count != counts[index]:  # outdated entry
+                continue
+            entry = first[index] + int(np.argmax(fits[first[index]:last[index]]))
+            decisions.append(int(entry))
+            fits[first[index]:last[index]] = False
+            counts[index] = 0
+
+            # the residual capacities only decrease, therefore the candidates cut never fit again
+            lost = []
+            dc_id = dc_ids[entry]
+            node_residual[dc_id] -= computing_units[entry]
+            cut = dc_offsets[dc_id] + np.searchsorted(dc_demands[dc_offsets[dc_id]:dc_cuts[dc_id]],
+                                                      node_residual[dc_id], side='right')
+            lost.append(dc_entries[cut:dc_cuts[dc_id]])
+            dc_cuts[dc_id] = cut
+            for link_id in link_ids[entry, link_mask[entry]].tolist():
+                link_residual[link_id] -= network_units[entry]
+                cut = link_offsets[link_id] + np.searchsorted(link_demands[link_offsets[link_id]:link_cuts[link_id]],
+                                                              link_residual[link_id], side='right')
+                lost.append(link_entries[cut:link_cuts[link_id]])
+                link_cuts[link_id] = cut
+            lost = np.concatenate(lost)
+            lost = np.unique(lost[fits[lost]])
+            if len(lost) > 0:
+                fits[lost] = False
+                indices, lost_counts = np.unique(owner[lost], return_counts=True)
+                counts[indices] -= lost_counts
+                for index, count in zip(indices.tolist(), counts[indices].tolist()):
+                    if count > 0:
+                        heapq.heappush(queue, (count, index))
+        return decisions
+
+    def solve_milp(self, batch: dict, num_services: int, link_residual: np.ndarray, node_residual: np.ndarray):
+        """
+        Assigns the services by solving a MILP with one binary variable per candidate, which maximizes the number
+        of restored services and, among the solutions doing so, minimizes the cost of the candidates (relocations
+        costing one more), subject to the residual capacities of links and DCs.
+        :return: list of the candidates assigned, as positions in `batch`, or None if the solver did not succeed
+        """
+        from scipy.optimize import LinearConstraint, milp  # optional dependency, checked in __init__
+        from scipy.sparse import coo_matrix
+
+        owner = batch['owner']
+        num_variables = len(owner)
+        entries, positions = np.nonzero(batch['link_mask'])
+        # DC constraints come after the ones of the links
+        rows = np.concatenate((batch['link_ids'][entries, positions], len(link_residual) + batch['dc_ids']))
+        columns = np.concatenate((entries, np.arange(num_variables)))
+        values = np.concatenate((batch['network_units'][entries], batch['computing_units']))
+        capacity = coo_matrix((values, (rows, columns)), shape=(len(link_residual) + len(node_residual), num_variables))
+        choices = coo_matrix((np.ones(num_variables), (owner, np.arange(num_variables))),
+                             shape=(num_services, num_variables))
+        # each restored service is worth more than the cost of any assignment of the whole batch
+        objective = batch['cost'] + batch['relocation'] - (2 * num_services + 1)
+        # failed elements are not used by any variable, their negative residual is clipped to keep the model feasible
+        upper = np.maximum(np.concatenate((link_residual, node_residual)), 0)
+        result = milp(objective, integrality=np.ones(num_variables), bounds=(0, 1),
+                      constraints=[LinearConstraint(capacity, -np.inf, upper), LinearConstraint(choices, -np.inf, 1)])
+        if not result.success:
+            self.env.logger.warning(f'MILP batch restoration failed ({result.message}), using the greedy')
+            return None
+        return np.flatnonzero(result.x > 0.5).tolist()
@@ -2,11 +2,10 @@ import abc
 import typing
 import numpy as np
 from typing import Tuple, Optional
-import random
 if typing.TYPE_CHECKING:
-    from core import Service
-    from graph import Path
-    from networkx import Graph
+    from core import Environment, Service
+    from graph import CandidatePaths, Path
+    from resources import ResourceState
 
 
 class RoutingPolicy(abc.ABC):
@@ -29,20 +28,13 @@ class ClosestAvailableDC(RoutingPolicy):
         """
         Finds the closest DC with enough available CPUs and with a path with enough available network resources
         """
-        found = False
-        closest_path_hops = np.finfo(0.0).max  # initializes load to the maximum value of a float
-        closest_dc = None
-        closest_path = None
-        for iddc, dc in enumerate(self.env.topology.graph['dcs']):
-            if self.env.topology.nodes[dc]['available_units'] >= service.computing_units:
-                paths = self.env.topology.graph['ksp'][service.source, dc] #Pegar o service.dest ao inves do source
-                for idp, path in enumerate(paths):
-                    if is_path_viable(self.env.topology, path, service.network_units) and closest_path_hops > path.hops:
-                        closest_path_hops = path.hops
-                        closest_dc = dc
-                        closest_path = path
-                        found = True
-        return found, closest_dc, closest_path  # returns false and an index out of bounds if no path is available
+        candidates = self.env.topology.graph['candidates'][service.source]
+        viable = get_viable_candidates(self.env.resources, candidates, service)
+        if not viable.any():
+            return False, None, None
+        best = select_candidate(viable, candidates.hops)
+        return True, candidates.dcs[best], candidates.paths[best]
+
 class RandomAvailableDC(RoutingPolicy):
 
     def __init__(self):
@@ -59,14 +51,14 @@ class RandomAvailableDC(RoutingPolicy):
         closest_path = None
         dc_list  = self.env.topology.graph['dcs'].copy()
         while(len(dc_list)>0 and found == False):
-            dc = random.choice(dc_list)
+            dc = dc_list[self.env.streams.routing.integers(len(dc_list))]
             for d in dc_list:
                 if d == dc:
                     dc_list.remove(d)
-            if self.env.topology.nodes[dc]['available_units'] >= service.computing_units:
+            if self.env.resources.node_available_units[self.env.resources.node_index[dc]] >= service.computing_units:
                 paths = self.env.topology.graph['ksp'][service.source, dc]
                 for idp, path in enumerate(paths):
-                    if is_path_viable(self.env.topology, path, service.network_units) and closest_path_hops > path.hops:
+                    if is_path_viable(self.env.resources, path, service.network_units) and closest_path_hops > path.hops:
                         closest_path_hops = path.hops
                         closest_dc = dc
                         closest_path = path
@@ -84,20 +76,12 @@ class FarthestAvailableDC(RoutingPolicy):
         """
         Finds the farthest DC with enough available CPUs and with a path with enough available network resources
         """
-        found = False
-        farthest_path_hops = 0.0  # initializes load to the maximum value of a float
-        farthest_dc = None
-        farthest_path = None
-        for iddc, dc in enumerate(self.env.topology.graph['dcs']):
-            if self.env.topology.nodes[dc]['available_units'] >= service.computing_units:
-                paths = self.env.topology.graph['ksp'][service.source, dc]
-                for idp, path in enumerate(paths):
-                    if is_path_viable(self.env.topology, path, service.network_units) and farthest_path_hops < path.hops:
-                        farthest_path_hops = path.hops
-                        farthest_dc = dc
-                        farthest_path = path
-                        found = True
-        return found, farthest_dc, farthest_path  # returns false and an index out of bounds if no path is available
+        candidates = self.env.topology.graph['candidates'][service.source]
+        viable = get_viable_candidates(self.env.resources, candidates, service)
+        if not viable.any():
+            return False, None, None
+        best = select_candidate(viable, -candidates.hops)
+        return True, candidates.dcs[best], candidates.paths[best]
 
 
 class FullLoadBalancing(RoutingPolicy):
@@ -110,70 +94,78 @@ class FullLoadBalancing(RoutingPolicy):
         """
         Finds the path+DC pair with lowest combined load
         """
-        found = False
-        lowest_load = np.finfo(0.0).max  # initializes load to the maximum value of a float
-        closest_dc = None
-        closest_path = None
-        for iddc, dc in enumerate(self.env.topology.graph['dcs']):
-            if self.env.topology.nodes[dc]['available_units'] >= service.computing_units:
-                paths = self.env.topology.graph['ksp'][service.source, dc]
-                for idp, path in enumerate(paths):
-                    load = (get_max_usage(self.env.topology, path) / self.env.resource_units_per_link) * \
-                           ((self.env.topology.nodes[dc]['total_units'] - self.env.topology.nodes[dc]['available_units']) /
-                            self.env.topology.nodes[dc]['total_units'])
-                    if is_path_viable(self.env.topology, path, service.network_units) and load < lowest_load:
-                        lowest_load = load
-                        closest_dc = dc
-                        closest_path = path
-                        found = True
-        return found, closest_dc, closest_path  # returns false and an index out of bounds if no path is available
+        candidates = self.env.topology.graph['candidates'][service.source]
+        viable = get_viable_candidates(self.env.resources, candidates, service)
+        if not viable.any():
+            return False, None, None
+        dc_usage = (self.env.resources.node_total_units[candidates.dc_ids] - self.env.resources.node_available_units[candidates.dc_ids]) / \
+                   self.env.resources.node_total_units[candidates.dc_ids]
+        load = (get_candidates_max_usage(self.env.resources, candidates) / self.env.resource_units_per_link) * dc_usage
+        best = select_candidate(viable, load)
+        return True, candidates.dcs[best], candidates.paths[best]
+
+
+def get_viable_candidates(resources: 'ResourceState', candidates: 'CandidatePaths', service: 'Service') -> np.ndarray:
+    """
+    Evaluates at once which (DC, path) candidates have enough computing units at the DC and
+    enough network units in every link, with no failed link or node along the path
+    """
+    available = np.where(candidates.link_mask, resources.link_available_units[candidates.link_ids], np.iinfo(np.int64).max)
+    failed_links = (resources.link_failed[candidates.link_ids] & candidates.link_mask).any(axis=1)
+    failed_nodes = (resources.node_failed[candidates.node_ids] & candidates.node_mask).any(axis=1)
+    return (resources.node_available_units[candidates.dc_ids] >= service.computing_units) \
+        & (available.min(axis=1) >= service.network_units) & ~failed_links & ~failed_nodes
+
+
+def get_candidates_max_usage(resources: 'ResourceState', candidates: 'CandidatePaths') -> np.ndarray:
+    """
+    Obtains the maximum usage of resources among the links forming each candidate path
+    """
+    usage = resources.link_total_units[candidates.link_ids] - resources.link_available_units[candidates.link_ids]
+    return np.where(candidates.link_mask, usage, np.iinfo(np.int64).min).max(axis=1)
 
 
-def is_path_viable(topology: 'Graph', path: 'Path', number_network_units: int) -> bool:
-    for node in path.node_list:
-        if topology.nodes[node]['failed']:
-            return False
-    for i in range(len(path.node_list) - 1):
-        if topology[path.node_list[i]][path.node_list[i + 1]]['failed'] \
-            or topology[path.node_list[i]][path.node_list[i + 1]]['available_units'] < number_network_units:
-            return False
+def select_candidate(viable: np.ndarray, cost: np.ndarray) -> int:
+    """
+    Returns the row of the viable candidate with the lowest cost.
+    Ties are broken by the row order, i.e., the first DC and then the shortest path.
+    """
+    viable_rows = np.flatnonzero(viable)
+    return viable_rows[np.argmin(cost[viable_rows])]
+
+
+def is_path_viable(resources: 'ResourceState', path: 'Path', number_network_units: int) -> bool:
+    if resources.node_failed[path.node_ids].any():
+        return False
+    if resources.link_failed[path.link_ids].any() or resources.link_available_units[path.link_ids].min() < number_network_units:
+        return False
     return True
 
 
-def get_max_usage(topology: 'Graph', path: 'Path') -> int:
+def get_max_usage(resources: 'ResourceState', path: 'Path') -> int:
     """
     Obtains the maximum usage of resources among all the links forming the path
     """
-    max_usage = np.finfo(0.0).min
-    for i in range(len(path.node_list) - 1):
-        max_usage = max(max_usage, topology[path.node_list[i]][path.node_list[i + 1]]['total_units'] - topology[path.node_list[i]][path.node_list[i + 1]]['available_units'])
-    return max_usage
-
-def get_path_risk(topology: 'Graph', path: 'Path'):
-    aecl:float = 0.0
-    for i in range(len(path.node_list) - 1):
-        x = topology[path.node_list[i]][path.node_list[i + 1]]['current_failure_probability']
-        y = topology[path.node_list[i]][path.node_list[i+1]]['total_units']
-        aecl += topology[path.node_list[i]][path.node_list[i + 1]]['current_failure_probability'] * topology[path.node_list[i]][path.node_list[i+1]]['total_units']
-        #aecl += topology[path.node_list[i]][path.node_list[i+1]]['total_units']
-        #print(topology[path.node_list[i]][path.node_list[i + 1]]['link_failure_probability'])
-        #print(topology[path.node_list[i]][path.node_list[i + 1]]['total_units'])
-    return (aecl / (len(path.node_list) - 1))
-
-def get_shortest_path(topology: 'Graph', service: 'Service') -> Optional['Path']:
+    return np.max(resources.link_total_units[path.link_ids] - resources.link_available_units[path.link_ids])
+
+def get_path_risk(resources: 'ResourceState', path: 'Path'):
+    aecl: float = float(np.sum(resources.link_current_failure_probability[path.link_ids] * resources.link_total_units[path.link_ids]))
+    return (aecl / path.hops)
+
+def get_shortest_path(env: 'Environment', service: 'Service') -> Optional['Path']:
     if service.destination is None:
         raise ValueError(f"Service should have value for destination, got {service}")
     closest_path = None
     closest_path_hops = np.finfo(0.0).max
-    if topology.nodes[service.destination]['available_units'] >= service.computing_units:
-        paths = topology.graph['ksp'][service.source, service.destination]
+    if env.resources.node_available_units[env.resources.node_index[service.destination]] >= service.computing_units:
+        paths = env.topology.graph['ksp'][service.source, service.destination]
         for path in paths:
-            if is_path_viable(topology, path, service.network_units) and closest_path_hops > path.hops:
+            if is_path_viable(env.resources, path, service.network_units) and closest_path_hops > path.hops:
                 closest_path_hops = path.hops
                 closest_path = path
     return closest_path
 
-def get_safest_path(topology: 'Graph', service: 'Service') -> Optional['Path']:
+def get_safest_path(env: 'Environment', service: 'Service') -> Optional['Path']:
     if service.destination is None:
         raise ValueError(f"Service should have value for destination, got {service}")
     closest_path_hops = np.finfo(0.0).max
@@ -183,23 +175,22 @@ def get_safest_path(topology: 'Graph', service: 'Service') -> Optional['Path']:
     prob_list = [0.73, 0.15, 0.05, 0]
     aux_list = [0,0,0,0]
     aux_dict = []
-    if topology.nodes[service.destination]['available_units'] >= service.computing_units:
-        #paths = topology.graph['prob_ksp'][service.source, service.destination]
-        paths = topology.graph['ksp'][service.source, service.destination]
+    if env.resources.node_available_units[env.resources.node_index[service.destination]] >= service.computing_units:
+        #paths = env.topology.graph['prob_ksp'][service.source, service.destination]
+        paths = env.topology.graph['ksp'][service.source, service.destination]
         print(len(paths))
         
         for p in paths:
-            if(is_path_viable(topology, p, service.network_units)):
+            if(is_path_viable(env.resources, p, service.network_units)):
                 viable_paths.append(p)
         
         for i, path in enumerate(viable_paths):
             print("\n")
             aux_list = [0,0,0,0,0]
             aux_list[4] = i
-            for j in range(len(path.node_list)-1):
-                for idx, prob in enumerate(prob_list):
-                    if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                        aux_list[idx]+=1
+            probs = env.resources.link_current_failure_probability[path.link_ids]
+            for idx, prob in enumerate(prob_list):
+                aux_list[idx] += int(np.count_nonzero(probs == prob))
                 
             aux_dict.append(aux_list)
         aux_dict.sort()
@@ -215,9 +206,9 @@ def get_safest_path(topology: 'Graph', service: 'Service') -> Optional['Path']:
         for path in paths:
             print("get safest path hops")
             
-            new_path_risk = get_path_risk(topology, path)
+            new_path_risk = get_path_risk(env.resources, path)
             print("Anterior: ", new_path_risk)
-            if is_path_viable(topology, path, service.network_units) and safest_path_risk > new_path_risk:
+            if is_path_viable(env.resources, path, service.network_units) and safest_path_risk > new_path_risk:
                 print (new_path_risk)
                 closest_path_hops = path.hops
                 safest_path_risk = new_path_risk
@@ -226,7 +217,7 @@ def get_safest_path(topology: 'Graph', service: 'Service') -> Optional['Path']:
     #print(safest_path_risk)
     return safest_path
 
-def get_safest_dc(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'Path']:
+def get_safest_dc(env: 'Environment', service: 'Service') -> Tuple[bool, str, 'Path']:
         """
         Finds the path+DC pair with lowest combined load
         """
@@ -237,17 +228,16 @@ def get_safest_dc(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'Pa
         lowest_risk = [1,0,0,0]
         safest_path = None
         safest_dc = None
-        for iddc, dc in enumerate(topology.graph['dcs']):
-            if topology.nodes[dc]['available_units'] >= service.computing_units:
-                paths = topology.graph['ksp'][service.source, dc]
+        for iddc, dc in enumerate(env.topology.graph['dcs']):
+            if env.resources.node_available_units[env.resources.node_index[dc]] >= service.computing_units:
+                paths = env.topology.graph['ksp'][service.source, dc]
                 for idp, path in enumerate(paths):
                     aux_list = [0,0,0,0]
-                    for j in range(len(path.node_list)-1):
-                        for idx, prob in enumerate(prob_list):
-                            if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                                aux_list[idx]+=1
+                    probs = env.resources.link_current_failure_probability[path.link_ids]
+                    for idx, prob in enumerate(prob_list):
+                        aux_list[idx] += int(np.count_nonzero(probs == prob))
                     risk = aux_list.copy()
-                    if is_path_viable(topology, path, service.network_units) and risk < lowest_risk:
+                    if is_path_viable(env.resources, path, service.network_units) and risk < lowest_risk:
                         lowest_risk=risk.copy()
                         safest_dc = dc
                         safest_path = path
@@ -257,7 +247,7 @@ def get_safest_dc(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'Pa
                         print(".")
         return found, safest_dc, safest_path  # returns false and an index out of bounds if no path is available
 
-def get_balanced_safest_dc(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'Path']:
+def get_balanced_safest_dc(env: 'Environment', service: 'Service') -> Tuple[bool, str, 'Path']:
         """
         Finds the path+DC pair with lowest combined load
         """
@@ -273,9 +263,9 @@ def get_balanced_safest_dc(topology: 'Graph', service: 'Service') -> Tuple[bool,
         highest_prob: float = 0.0
         max_hops = 0
         path_hops = 0
-        for iddc, dc in enumerate(topology.graph['dcs']):
-            if topology.nodes[dc]['available_units'] >= service.computing_units:
-                paths = topology.graph['ksp'][service.source, dc]
+        for iddc, dc in enumerate(env.topology.graph['dcs']):
+            if env.resources.node_available_units[env.resources.node_index[dc]] >= service.computing_units:
+                paths = env.topology.graph['ksp'][service.source, dc]
 
                 for path in paths:
                     path_hops = (len(path.node_list)-1)
@@ -288,23 +278,19 @@ def get_balanced_safest_dc(topology: 'Graph', service: 'Service') -> Tuple[bool,
                     highest_prob = 0
                     prob = 0            
                     f_var = 0
-                    for j in range(len(path.node_list)-1):
-                        #prob += float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                        prob = float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                        if prob > highest_prob:
-                            highest_prob = prob
+                    probs = env.resources.link_current_failure_probability[path.link_ids]
+                    highest_prob = max(highest_prob, float(probs.max()))
                         
                     #mean_prob = prob/(len(path.node_list)-1)
 
-                    for j in range(len(path.node_list)-1):
-                        for idx, prob in enumerate(prob_list):
-                            if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                                aux_list[idx]+=1
-                                #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
-                                f_var = (0.5*((len(path.node_list)-1)/max_hops))+(0.5*highest_prob)
-                                #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
+                    for idx, prob in enumerate(prob_list):
+                        aux_list[idx] += int(np.count_nonzero(probs == prob))
+                    if any(aux_list):
+                        #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
+                        f_var = (0.5*((len(path.node_list)-1)/max_hops))+(0.5*highest_prob)
+                        #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
                     risk = aux_list.copy()
-                    if is_path_viable(topology, path, service.network_units) and f_var < lowest_f_var:
+                    if is_path_viable(env.resources, path, service.network_units) and f_var < lowest_f_var:
                         lowest_risk=risk.copy()
                         lowest_f_var = f_var
                         safest_dc = dc
@@ -315,7 +301,7 @@ def get_balanced_safest_dc(topology: 'Graph', service: 'Service') -> Tuple[bool,
                         print(".")
         return found, safest_dc, safest_path  # returns false and an index out of bounds if no path is available
 
-def get_balanced_sasfest_path(topology: 'Graph', service: 'Service') -> Optional['Path']:
+def get_balanced_sasfest_path(env: 'Environment', service: 'Service') -> Optional['Path']:
     if service.destination is None:
         raise ValueError(f"Service should have value for destination, got {service}")
     closest_path_hops = np.finfo(0.0).max
@@ -331,13 +317,13 @@ def get_balanced_sasfest_path(topology: 'Graph', service: 'Service') -> Optional
     num_hops: int = 0
     f_max: float = 100
     highest_prob = 0
-    if topology.nodes[service.destination]['available_units'] >= service.computing_units:
-        #paths = topology.graph['prob_ksp'][service.source, service.destination]
-        paths = topology.graph['ksp'][service.source, service.destination]
+    if env.resources.node_available_units[env.resources.node_index[service.destination]] >= service.computing_units:
+        #paths = env.topology.graph['prob_ksp'][service.source, service.destination]
+        paths = env.topology.graph['ksp'][service.source, service.destination]
         
         for p in paths:
             num_hops = 0
-            if(is_path_viable(topology, p, service.network_units)):
+            if(is_path_viable(env.resources, p, service.network_units)):
                 viable_paths.append(p)
                 num_hops = (len(p.node_list)-1)
                 if(num_hops>max_hops):
@@ -347,20 +333,14 @@ def get_balanced_sasfest_path(topology: 'Graph', service: 'Service') -> Optional
         for i, path in enumerate(viable_paths):
             prob = 0
             highest_prob = 0
-            for j in  range(len(path.node_list)-1):
-                #prob += float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                
-                prob = float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                if prob > highest_prob:
-                    highest_prob = prob
+            probs = env.resources.link_current_failure_probability[path.link_ids]
+            highest_prob = max(highest_prob, float(probs.max()))
             #mean_prob = prob/(len(path.node_list)-1)
 
             aux_list = [0,0,0,0,0,0]
             aux_list[4] = i  #Saves the Index in viable_paths list for further use
-            for j in range(len(path.node_list)-1):
-                for idx, prob in enumerate(prob_list):
-                    if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                        aux_list[idx]+=1
+            for idx, prob in enumerate(prob_list):
+                aux_list[idx] += int(np.count_nonzero(probs == prob))
             #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
             f_var = (0.5*((len(path.node_list)-1)/max_hops))+(0.5*highest_prob)
             #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
@@ -380,7 +360,7 @@ def get_balanced_sasfest_path(topology: 'Graph', service: 'Service') -> Optional
 
     return safest_path
 
-def get_dc_alfa_04(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'Path']:
+def get_dc_alfa_04(env: 'Environment', service: 'Service') -> Tuple[bool, str, 'Path']:
         """
         Finds the path+DC pair with lowest combined load
         """
@@ -396,9 +376,9 @@ def get_dc_alfa_04(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
         highest_prob: float = 0.0
         max_hops = 0
         path_hops = 0
-        for iddc, dc in enumerate(topology.graph['dcs']):
-            if topology.nodes[dc]['available_units'] >= service.computing_units:
-                paths = topology.graph['ksp'][service.source, dc]
+        for iddc, dc in enumerate(env.topology.graph['dcs']):
+            if env.resources.node_available_units[env.resources.node_index[dc]] >= service.computing_units:
+                paths = env.topology.graph['ksp'][service.source, dc]
 
                 for path in paths:
                     path_hops = (len(path.node_list)-1)
@@ -411,23 +391,19 @@ def get_dc_alfa_04(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
                     highest_prob = 0
                     prob = 0            
                     f_var = 0
-                    for j in range(len(path.node_list)-1):
-                        #prob += float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                        prob = float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                        if prob > highest_prob:
-                            highest_prob = prob
+                    probs = env.resources.link_current_failure_probability[path.link_ids]
+                    highest_prob = max(highest_prob, float(probs.max()))
                         
                     #mean_prob = prob/(len(path.node_list)-1)
 
-                    for j in range(len(path.node_list)-1):
-                        for idx, prob in enumerate(prob_list):
-                            if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                                aux_list[idx]+=1
-                                #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
-                                f_var = (0.6*((len(path.node_list)-1)/max_hops))+(0.4*highest_prob)
-                                #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
+                    for idx, prob in enumerate(prob_list):
+                        aux_list[idx] += int(np.count_nonzero(probs == prob))
+                    if any(aux_list):
+                        #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
+                        f_var = (0.6*((len(path.node_list)-1)/max_hops))+(0.4*highest_prob)
+                        #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
                     risk = aux_list.copy()
-                    if is_path_viable(topology, path, service.network_units) and f_var < lowest_f_var:
+                    if is_path_viable(env.resources, path, service.network_units) and f_var < lowest_f_var:
                         lowest_risk=risk.copy()
                         lowest_f_var = f_var
                         safest_dc = dc
@@ -438,7 +414,7 @@ def get_dc_alfa_04(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
                         print(".")
         return found, safest_dc, safest_path  # returns false and an index out of bounds if no path is available
 
-def get_path_alfa_04(topology: 'Graph', service: 'Service') -> Optional['Path']:
+def get_path_alfa_04(env: 'Environment', service: 'Service') -> Optional['Path']:
     if service.destination is None:
         raise ValueError(f"Service should have value for destination, got {service}")
     closest_path_hops = np.finfo(0.0).max
@@ -454,13 +430,13 @@ def get_path_alfa_04(topology: 'Graph', service: 'Service') -> Optional['Path']:
     num_hops: int = 0
     f_max: float = 100
     highest_prob = 0
-    if topology.nodes[service.destination]['available_units'] >= service.computing_units:
-        #paths = topology.graph['prob_ksp'][service.source, service.destination]
-        paths = topology.graph['ksp'][service.source, service.destination]
+    if env.resources.node_available_units[env.resources.node_index[service.destination]] >= service.computing_units:
+        #paths = env.topology.graph['prob_ksp'][service.source, service.destination]
+        paths = env.topology.graph['ksp'][service.source, service.destination]
         
         for p in paths:
             num_hops = 0
-            if(is_path_viable(topology, p, service.network_units)):
+            if(is_path_viable(env.resources, p, service.network_units)):
                 viable_paths.append(p)
                 num_hops = (len(p.node_list)-1)
                 if(num_hops>max_hops):
@@ -470,20 +446,14 @@ def get_path_alfa_04(topology: 'Graph', service: 'Service') -> Optional['Path']:
         for i, path in enumerate(viable_paths):
             prob = 0
             highest_prob = 0
-            for j in  range(len(path.node_list)-1):
-                #prob += float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                
-                prob = float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                if prob > highest_prob:
-                    highest_prob = prob
+            probs = env.resources.link_current_failure_probability[path.link_ids]
+            highest_prob = max(highest_prob, float(probs.max()))
             #mean_prob = prob/(len(path.node_list)-1)
 
             aux_list = [0,0,0,0,0,0]
             aux_list[4] = i  #Saves the Index in viable_paths list for further use
-            for j in range(len(path.node_list)-1):
-                for idx, prob in enumerate(prob_list):
-                    if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                        aux_list[idx]+=1
+            for idx, prob in enumerate(prob_list):
+                aux_list[idx] += int(np.count_nonzero(probs == prob))
             #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
             f_var = (0.6*((len(path.node_list)-1)/max_hops))+(0.4*highest_prob)
             #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
@@ -503,7 +473,7 @@ def get_path_alfa_04(topology: 'Graph', service: 'Service') -> Optional['Path']:
 
     return safest_path
 
-def get_dc_alfa_03(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'Path']:
+def get_dc_alfa_03(env: 'Environment', service: 'Service') -> Tuple[bool, str, 'Path']:
         """
         Finds the path+DC pair with lowest combined load
         """
@@ -519,9 +489,9 @@ def get_dc_alfa_03(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
         highest_prob: float = 0.0
         max_hops = 0
         path_hops = 0
-        for iddc, dc in enumerate(topology.graph['dcs']):
-            if topology.nodes[dc]['available_units'] >= service.computing_units:
-                paths = topology.graph['ksp'][service.source, dc]
+        for iddc, dc in enumerate(env.topology.graph['dcs']):
+            if env.resources.node_available_units[env.resources.node_index[dc]] >= service.computing_units:
+                paths = env.topology.graph['ksp'][service.source, dc]
 
                 for path in paths:
                     path_hops = (len(path.node_list)-1)
@@ -534,23 +504,19 @@ def get_dc_alfa_03(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
                     highest_prob = 0
                     prob = 0            
                     f_var = 0
-                    for j in range(len(path.node_list)-1):
-                        #prob += float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                        prob = float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                        if prob > highest_prob:
-                            highest_prob = prob
+                    probs = env.resources.link_current_failure_probability[path.link_ids]
+                    highest_prob = max(highest_prob, float(probs.max()))
                         
                     #mean_prob = prob/(len(path.node_list)-1)
 
-                    for j in range(len(path.node_list)-1):
-                        for idx, prob in enumerate(prob_list):
-                            if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                                aux_list[idx]+=1
-                                #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
-                                f_var = (0.7*((len(path.node_list)-1)/max_hops))+(0.3*highest_prob)
-                                #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
+                    for idx, prob in enumerate(prob_list):
+                        aux_list[idx] += int(np.count_nonzero(probs == prob))
+                    if any(aux_list):
+                        #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
+                        f_var = (0.7*((len(path.node_list)-1)/max_hops))+(0.3*highest_prob)
+                        #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
                     risk = aux_list.copy()
-                    if is_path_viable(topology, path, service.network_units) and f_var < lowest_f_var:
+                    if is_path_viable(env.resources, path, service.network_units) and f_var < lowest_f_var:
                         lowest_risk=risk.copy()
                         lowest_f_var = f_var
                         safest_dc = dc
@@ -561,7 +527,7 @@ def get_dc_alfa_03(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
                         print(".")
         return found, safest_dc, safest_path  # returns false and an index out of bounds if no path is available
 
-def get_path_alfa_03(topology: 'Graph', service: 'Service') -> Optional['Path']:
+def get_path_alfa_03(env: 'Environment', service: 'Service') -> Optional['Path']:
     if service.destination is None:
         raise ValueError(f"Service should have value for destination, got {service}")
     closest_path_hops = np.finfo(0.0).max
@@ -577,13 +543,13 @@ def get_path_alfa_03(topology: 'Graph', service: 'Service') -> Optional['Path']:
     num_hops: int = 0
     f_max: float = 100
     highest_prob = 0
-    if topology.nodes[service.destination]['available_units'] >= service.computing_units:
-        #paths = topology.graph['prob_ksp'][service.source, service.destination]
-        paths = topology.graph['ksp'][service.source, service.destination]
+    if env.resources.node_available_units[env.resources.node_index[service.destination]] >= service.computing_units:
+        #paths = env.topology.graph['prob_ksp'][service.source, service.destination]
+        paths = env.topology.graph['ksp'][service.source, service.destination]
         
         for p in paths:
             num_hops = 0
-            if(is_path_viable(topology, p, service.network_units)):
+            if(is_path_viable(env.resources, p, service.network_units)):
                 viable_paths.append(p)
                 num_hops = (len(p.node_list)-1)
                 if(num_hops>max_hops):
@@ -593,20 +559,14 @@ def get_path_alfa_03(topology: 'Graph', service: 'Service') -> Optional['Path']:
         for i, path in enumerate(viable_paths):
             prob = 0
             highest_prob = 0
-            for j in  range(len(path.node_list)-1):
-                #prob += float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                
-                prob = float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                if prob > highest_prob:
-                    highest_prob = prob
+            probs = env.resources.link_current_failure_probability[path.link_ids]
+            highest_prob = max(highest_prob, float(probs.max()))
             #mean_prob = prob/(len(path.node_list)-1)
 
             aux_list = [0,0,0,0,0,0]
             aux_list[4] = i  #Saves the Index in viable_paths list for further use
-            for j in range(len(path.node_list)-1):
-                for idx, prob in enumerate(prob_list):
-                    if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                        aux_list[idx]+=1
+            for idx, prob in enumerate(prob_list):
+                aux_list[idx] += int(np.count_nonzero(probs == prob))
             #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
             f_var = (0.7*((len(path.node_list)-1)/max_hops))+(0.3*highest_prob)
             #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
@@ -625,7 +585,7 @@ def get_path_alfa_03(topology: 'Graph', service: 'Service') -> Optional['Path']:
             safest_path = None
 
     return safest_path
-def get_dc_alfa_01(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'Path']:
+def get_dc_alfa_01(env: 'Environment', service: 'Service') -> Tuple[bool, str, 'Path']:
         """
         Finds the path+DC pair with lowest combined load
         """
@@ -641,9 +601,9 @@ def get_dc_alfa_01(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
         highest_prob: float = 0.0
         max_hops = 0
         path_hops = 0
-        for iddc, dc in enumerate(topology.graph['dcs']):
-            if topology.nodes[dc]['available_units'] >= service.computing_units:
-                paths = topology.graph['ksp'][service.source, dc]
+        for iddc, dc in enumerate(env.topology.graph['dcs']):
+            if env.resources.node_available_units[env.resources.node_index[dc]] >= service.computing_units:
+                paths = env.topology.graph['ksp'][service.source, dc]
 
                 for path in paths:
                     path_hops = (len(path.node_list)-1)
@@ -656,23 +616,19 @@ def get_dc_alfa_01(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
                     highest_prob = 0
                     prob = 0            
                     f_var = 0
-                    for j in range(len(path.node_list)-1):
-                        #prob += float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                        prob = float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                        if prob > highest_prob:
-                            highest_prob = prob
+                    probs = env.resources.link_current_failure_probability[path.link_ids]
+                    highest_prob = max(highest_prob, float(probs.max()))
                         
                     #mean_prob = prob/(len(path.node_list)-1)
 
-                    for j in range(len(path.node_list)-1):
-                        for idx, prob in enumerate(prob_list):
-                            if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                                aux_list[idx]+=1
-                                #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
-                                f_var = (0.9*((len(path.node_list)-1)/max_hops))+(0.1*highest_prob)
-                                #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
+                    for idx, prob in enumerate(prob_list):
+                        aux_list[idx] += int(np.count_nonzero(probs == prob))
+                    if any(aux_list):
+                        #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
+                        f_var = (0.9*((len(path.node_list)-1)/max_hops))+(0.1*highest_prob)
+                        #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
                     risk = aux_list.copy()
-                    if is_path_viable(topology, path, service.network_units) and f_var < lowest_f_var:
+                    if is_path_viable(env.resources, path, service.network_units) and f_var < lowest_f_var:
                         lowest_risk=risk.copy()
                         lowest_f_var = f_var
                         safest_dc = dc
@@ -683,7 +639,7 @@ def get_dc_alfa_01(topology: 'Graph', service: 'Service') -> Tuple[bool, str, 'P
                         print(".")
         return found, safest_dc, safest_path  # returns false and an index out of bounds if no path is available
 
-def get_path_alfa_01(topology: 'Graph', service: 'Service') -> Optional['Path']:
+def get_path_alfa_01(env: 'Environment', service: 'Service') -> Optional['Path']:
     if service.destination is None:
         raise ValueError(f"Service should have value for destination, got {service}")
     closest_path_hops = np.finfo(0.0).max
@@ -699,13 +655,13 @@ def get_path_alfa_01(topology: 'Graph', service: 'Service') -> Optional['Path']:
     num_hops: int = 0
     f_max: float = 100
     highest_prob = 0
-    if topology.nodes[service.destination]['available_units'] >= service.computing_units:
-        #paths = topology.graph['prob_ksp'][service.source, service.destination]
-        paths = topology.graph['ksp'][service.source, service.destination]
+    if env.resources.node_available_units[env.resources.node_index[service.destination]] >= service.computing_units:
+        #paths = env.topology.graph['prob_ksp'][service.source, service.destination]
+        paths = env.topology.graph['ksp'][service.source, service.destination]
         
         for p in paths:
             num_hops = 0
-            if(is_path_viable(topology, p, service.network_units)):
+            if(is_path_viable(env.resources, p, service.network_units)):
                 viable_paths.append(p)
                 num_hops = (len(p.node_list)-1)
                 if(num_hops>max_hops):
@@ -715,20 +671,14 @@ def get_path_alfa_01(topology: 'Graph', service: 'Service') -> Optional['Path']:
         for i, path in enumerate(viable_paths):
             prob = 0
             highest_prob = 0
-            for j in  range(len(path.node_list)-1):
-                #prob += float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                
-                prob = float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability'])
-                if prob > highest_prob:
-                    highest_prob = prob
+            probs = env.resources.link_current_failure_probability[path.link_ids]
+            highest_prob = max(highest_prob, float(probs.max()))
             #mean_prob = prob/(len(path.node_list)-1)
 
             aux_list = [0,0,0,0,0,0]
             aux_list[4] = i  #Saves the Index in viable_paths list for further use
-            for j in range(len(path.node_list)-1):
-                for idx, prob in enumerate(prob_list):
-                    if float(topology[path.node_list[j]][path.node_list[j+1]]['current_failure_probability']) == prob:
-                        aux_list[idx]+=1
+            for idx, prob in enumerate(prob_list):
+                aux_list[idx] += int(np.count_nonzero(probs == prob))
             #f_var = (0.95*((len(path.node_list)-1)/max_hops))+(highest_prob*0.05)
             f_var = (0.9*((len(path.node_list)-1)/max_hops))+(0.1*highest_prob)
             #f_var = (((len(path.node_list)-1)/max_hops))+(highest_prob)
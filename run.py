@@ -1,5 +1,4 @@
 import argparse
-import copy
 import pickle
 import datetime
 import time
@@ -9,18 +8,47 @@ import git
 import os
 import numpy as np
 from multiprocessing import Pool
-from multiprocessing import Manager
 
 import core
 import graph
 import plots
 import routing_policies
 import restoration_policies
+import schedulers
+import traces
 
 import logging
 logging.basicConfig(format='%(asctime)s\t%(name)-12s\t%(threadName)s\t%(message)s', level=logging.DEBUG)
 
 
+# topology attached by each worker of the pool (see `init_worker`)
+worker_topology = None
+worker_topology_block = None
+
+
+def init_worker(topology_block_name, topology_segments):
+    """
+    Attaches the worker to the topology shared by the main process, once for all the tasks it runs.
+    """
+    global worker_topology, worker_topology_block
+    worker_topology, worker_topology_block = graph.attach_topology(topology_block_name, topology_segments)
+
+
+def run_task(task):
+    """
+    Runs one task of the pool, i.e., one seed of one environment or of a group of environments in lockstep.
+    Environments are received without the topology, and each one gets a shallow copy of the worker topology,
+    i.e., its own node and link attributes for the simulation while sharing the paths.
+    """
+    env_or_group, seed = task
+    if isinstance(env_or_group, list):
+        for env_t in env_or_group:
+            env_t.topology = worker_topology.copy()
+        return core.run_lockstep_simulation(env_or_group, seeds=[seed])
+    env_or_group.topology = worker_topology.copy()
+    return core.run_simulation(env_or_group, seeds=[seed])
+
+
 def run(uargs):
     start_time = time.time()
 
@@ -37,7 +65,8 @@ def run(uargs):
     exec_routing_policies = ['CADC']
     #'PR','DNR','PRCA'
     #exec_restoration_policies = ['PRPA','PRwR','PRPA(α=1)', 'PR_BPA','PRPA(α=0.5)','PRPA(α=0.7)','PRPA(α=0.9)',]
-    exec_restoration_policies = ['PRwR','PRPA(α=1)','PRPA(α=0.5)', 'PRPA(α=0.4)','PRPA(α=0.3)','PRPA(α=0.1)']
+    #'BR-MILP(α=0.5)' requires SciPy >= 1.9 (scipy.optimize.milp)
+    exec_restoration_policies = ['PRwR','PRPA(α=1)','PRPA(α=0.5)', 'PRPA(α=0.4)','PRPA(α=0.3)','PRPA(α=0.1)', 'BR(α=0.5)']
     loads = [x for x in range(args.min_load, args.max_load + 1, args.load_step)]
     #loads = [x for x in range(args.min_load, args.min_load + 1, args.load_step)]
 
@@ -69,13 +98,12 @@ def run(uargs):
     shutil.copytree('./', f'./results/{env.output_folder}/source-code/',
                     ignore=shutil.ignore_patterns('__pycache__', '*.pyc', '*.md', 'results', 'LICENSE', '*.ipynb', '.git', '.idea', '.gitignore'))
 
-    # preparing the thread-safe data structure to hold the results
-    manager = Manager()
-    results = manager.dict()
+    # preparing the data structure to hold the results, which is filled with the records returned by the workers
+    results = {}
     for routing_policy in exec_routing_policies:
-        results[routing_policy] = manager.dict()
+        results[routing_policy] = {}
         for restoration_policy in exec_restoration_policies:
-            results[routing_policy][restoration_policy] = {load: manager.list() for load in loads}
+            results[routing_policy][restoration_policy] = {load: [] for load in loads}
 
     envs = []
     for routing_policy in exec_routing_policies:  # runs the simulations for every routing policy
@@ -109,14 +137,16 @@ def run(uargs):
                     restoration_policy_instance = restoration_policies.PathRestorationBalancedPropabilitiesAware03()
                 elif restoration_policy == 'PRPA(α=0.1)':
                     restoration_policy_instance = restoration_policies.PathRestorationBalancedPropabilitiesAware01()
+                elif restoration_policy == 'BR(α=0.5)':
+                    restoration_policy_instance = restoration_policies.BatchRestorationPolicy(alpha=0.5)
+                elif restoration_policy == 'BR-MILP(α=0.5)':
+                    restoration_policy_instance = restoration_policies.BatchRestorationPolicy(alpha=0.5, solver='milp')
                 
                 else:
                     raise ValueError('Restoration policy was not configured correctly (value set to {})'.format(restoration_policy))
 
-                env_topology = copy.deepcopy(topology) # makes a deep copy of the topology object
                 env_t = core.Environment(uargs,
-                                        topology=env_topology,
-                                        results=results,
+                                        topology=topology,
                                         load=load,
                                         routing_policy=routing_policy_instance,
                                         restoration_policy=restoration_policy_instance,
@@ -138,19 +168,53 @@ def run(uargs):
                 
                 
 
+    if uargs.crn:
+        # generates the workload of each (load, seed) once, to be replayed by all policies; existing trace files,
+        # e.g., recorded or external workloads, are kept and replayed as they are
+        os.makedirs('./results/{}/traces'.format(env.output_folder), exist_ok=True)
+        for env_t in envs:
+            for seed in range(env_t.num_seeds):
+                trace_file = env_t.get_trace_file(env_t.seed + seed)
+                if not os.path.isfile(trace_file):
+                    traces.save_trace(trace_file, env_t.generate_trace(env_t.seed + seed))
+        logger.debug('Traces generated for the common random numbers mode')
+
     logger.debug(f'Starting pool of simulators with {uargs.threads} threads')
     # use the code above to keep updating the final plot as the simulation progresses
-    with Pool(processes=uargs.threads) as p:
-        result_pool = p.map_async(core.run_simulation, envs)
-        p.close()
-
-        done = False
-        while not done:
-            if result_pool.ready():
-                done = True
-            else:
-                time.sleep(uargs.temporary_plot_every)
-                plots.plot_final_results(env, results, start_time)
+    if uargs.lockstep:
+        # all restoration policies of the same routing policy and load run together
+        groups = {}
+        for env_t in envs:
+            groups.setdefault((env_t.routing_policy.name, env_t.load), []).append(env_t)
+        tasks = [(group, seed) for group in groups.values() for seed in range(group[0].num_seeds)]
+        tasks.sort(key=lambda task: task[0][0].load, reverse=True)
+    else:
+        tasks = [(env_t, seed) for env_t in envs for seed in range(env_t.num_seeds)]
+        tasks.sort(key=lambda task: task[0].load, reverse=True)
+    # each task simulates a single seed, and the tasks with higher loads, which take longer, are started first
+    # so that the shorter ones fill the workers until the end
+
+    # the topology is sent to the workers once through shared memory (see `init_worker`) instead of with each task
+    for env_t in envs:
+        env_t.topology = None
+    topology_block, topology_segments = graph.share_topology(topology)
+
+    try:  # the shared memory is released even if a simulation fails
+        with Pool(processes=uargs.threads, initializer=init_worker,
+                  initargs=(topology_block.name, topology_segments)) as p:
+            result_pool = p.imap_unordered(run_task, tasks)
+            p.close()
+
+            last_plot = time.time()
+            for records in result_pool:  # collects the records returned by each task as soon as it finishes
+                for routing_policy, restoration_policy, load, record in records:
+                    results[routing_policy][restoration_policy][load].append(record)
+                if time.time() - last_plot >= uargs.temporary_plot_every:
+                    plots.plot_final_results(env, results, start_time)
+                    last_plot = time.time()
+    finally:
+        topology_block.close()
+        topology_block.unlink()
 
     # if you do not want periodical updates, you can use the following code
     # with Pool(processes=uargs.threads) as p:
@@ -163,17 +227,10 @@ def run(uargs):
     plots.plot_final_results(env, results, start_time)
 
     with open('./results/{}/final_results.h5'.format(env.output_folder), 'wb') as file:
-        realized_results = dict(results)
-        for k1, v1 in results.items():
-            realized_results[k1] = dict(v1)
-            for k2, v2 in results[k1].items():
-                realized_results[k1][k2] = dict(v2)
-                for k3, v3 in results[k1][k2].items():
-                    realized_results[k1][k2][k3] = list(v3)
         pickle.dump({
             'args': uargs,
             'env': env,
-            'results': realized_results,
+            'results': results,
             'routing_policies': [policy for policy in exec_routing_policies],
             'restoration_policies': [policy for policy in exec_restoration_policies],
             'loads': loads,
@@ -187,9 +244,31 @@ def run(uargs):
 if __name__ == '__main__':
     env = core.Environment()
 
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(description='Runs the simulations of the routing and restoration policies listed at '
+                                                 'the top of this script. The BR-MILP restoration policy requires SciPy >= 1.9')
     parser.add_argument('--plot_simulation_progress', default=False, action='store_true',
                         help='Plot summary for each seed simulated (default=False)')
+    parser.add_argument('--streaming', default=False, action='store_true',
+                        help='Do not keep the services after they leave the system to bound memory usage (default=False)')
+    parser.add_argument('--log_services', default=False, action='store_true',
+                        help='Write the services that left the system to a binary log in the output folder (default=False)')
+    parser.add_argument('--crn', default=False, action='store_true',
+                        help='Replay the workload (arrivals and disasters) of each load and seed from '
+                             'results/<output_folder>/traces/trace_<load>_<seed>.npz, generating only the missing '
+                             'files. The random streams already give all policies the same workload, this allows '
+                             'replaying a recorded or external one (default=False)')
+    parser.add_argument('--lockstep', default=False, action='store_true',
+                        help='Run all restoration policies of each load in lockstep within one process, '
+                             'sharing the traffic and disasters (default=False)')
+    parser.add_argument('--ksp_algorithm', default='networkx', choices=['networkx', 'yen'],
+                        help='Algorithm computing the k shortest paths, in parallel with the number of threads. '
+                             'yen reuses the shortest-path tree of each DC and is faster for weighted paths, '
+                             'but may order paths of the same length differently (default=networkx)')
+    parser.add_argument('--no_ksp_cache', dest='ksp_cache', default=True, action='store_false',
+                        help='Always compute the k shortest paths instead of loading them from {} '
+                             '(default=False)'.format(graph.KSP_CACHE_FOLDER))
+    parser.add_argument('--scheduler', default=env.scheduler, choices=list(schedulers.SCHEDULERS.keys()),
+                        help='Scheduler implementing the event queue (default={})'.format(env.scheduler))
     parser.add_argument('-tf', '--topology_file', default=env.topology_file, help='Network topology file to be used')
     parser.add_argument('-a', '--num_arrivals', type=int, default=env.num_arrivals,
                         help='Number of arrivals per episode to be generated (default={})'.format(env.num_arrivals))
@@ -0,0 +1,154 @@
+import abc
+import bisect
+import heapq
+import math
+from typing import List
+
+
+class Scheduler(abc.ABC):
+    """
+    Event queue of the simulator. Entries are lists [time, sequence, kind, payload] (see `Environment.add_event`),
+    and are popped in increasing order of (time, sequence). Entries are never removed before being popped,
+    cancelled events are marked in the entry itself and skipped by the simulation loop.
+    """
+
+    def __init__(self):
+        self.name = None
+
+    @abc.abstractmethod
+    def push(self, entry: list) -> None:
+        pass
+
+    def push_many(self, entries: List[list]) -> None:
+        """
+        Pushes several entries at once, e.g., the departures of the services restored after a disaster.
+        """
+        for entry in entries:
+            self.push(entry)
+
+    @abc.abstractmethod
+    def pop(self) -> list:
+        pass
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class HeapScheduler(Scheduler):
+    """
+    Binary heap based on heapq, with O(log n) push and pop.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.name = 'heap'
+        self.heap: list = []
+
+    def push(self, entry: list) -> None:
+        heapq.heappush(self.heap, entry)
+
+    def push_many(self, entries: List[list]) -> None:
+        """
+        Merges the entries into the heap with a single heapify in O(n + m) when it is cheaper than
+        pushing them one by one in O(m log n).
+        """
+        size = len(self.heap) + len(entries)
+        if len(entries) * math.log2(size + 1) > size:
+            self.heap.extend(entries)
+            heapq.heapify(self.heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self.heap, entry)
+
+    def pop(self) -> list:
+        return heapq.heappop(self.heap)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+class CalendarQueueScheduler(Scheduler):
+    """
+    Calendar queue (R. Brown, "Calendar queues: a fast O(1) priority queue implementation for the
+    simulation event set problem", Communications of the ACM, 1988).
+    Entries are hashed by time into buckets ("days") of fixed width, each bucket kept sorted, and the queue
+    is dequeued by walking the buckets as a calendar. The number of buckets doubles/halves with the number of
+    entries and the width is re-estimated from the separation of the next events, so that push and pop take
+    amortized O(1) time when the event times follow a stable distribution, e.g., exponential arrivals and departures.
+    Entries are popped in exactly the same order as in `HeapScheduler`.
+    """
+
+    def __init__(self, num_buckets: int = 2, bucket_width: float = 1.0):
+        super().__init__()
+        self.name = 'calendar'
+        self.size: int = 0
+        self.last_time: float = 0.
+        self._build(num_buckets, bucket_width, [])
+
+    def _build(self, num_buckets: int, bucket_width: float, entries: List[list]) -> None:
+        """
+        (Re)creates the buckets and inserts the entries, which must be sorted.
+        """
+        self.num_buckets: int = num_buckets
+        self.bucket_width: float = bucket_width
+        self.buckets: List[list] = [[] for _ in range(num_buckets)]
+        for entry in entries:  # entries are sorted, therefore each bucket remains sorted
+            self.buckets[int(entry[0] // bucket_width) % num_buckets].append(entry)
+        # index of the day in which the last entry was popped, counted from time zero
+        self.current_day: int = int(self.last_time // bucket_width)
+
+    def _resize(self, num_buckets: int) -> None:
+        entries = sorted(entry for bucket in self.buckets for entry in bucket)
+        self._build(num_buckets, self._estimate_width(entries), entries)
+
+    def _estimate_width(self, entries: List[list]) -> float:
+        """
+        Estimates the bucket width as three times the average separation of the next events,
+        ignoring separations larger than twice the average, as suggested by Brown.
+        """
+        times = [entry[0] for entry in entries[:25]]
+        separations = [t2 - t1 for t1, t2 in zip(times, times[1:])]
+        if len(separations) == 0:
+            return self.bucket_width
+        average = sum(separations) / len(separations)
+        separations = [separation for separation in separations if separation <= 2 * average]
+        average = sum(separations) / len(separations)
+        return 3 * average if average > 0 else self.bucket_width
+
+    def push(self, entry: list) -> None:
+        bisect.insort(self.buckets[int(entry[0] // self.bucket_width) % self.num_buckets], entry)
+        self.size += 1
+        if self.size > 2 * self.num_buckets:
+            self._resize(2 * self.num_buckets)
+
+    def pop(self) -> list:
+        if self.size == 0:
+            raise IndexError('pop from an empty calendar queue')
+        # walks one "year" of the calendar looking for an entry within the day being visited
+        for day in range(self.current_day, self.current_day + self.num_buckets):
+            bucket = self.buckets[day % self.num_buckets]
+            if len(bucket) > 0 and bucket[0][0] // self.bucket_width <= day:
+                return self._pop_from(bucket, day)
+        # no entry within the next year: jumps directly to the earliest entry
+        bucket = min((bucket for bucket in self.buckets if len(bucket) > 0), key=lambda b: b[0])
+        return self._pop_from(bucket, int(bucket[0][0] // self.bucket_width))
+
+    def _pop_from(self, bucket: list, day: int) -> list:
+        entry = bucket.pop(0)
+        self.size -= 1
+        self.current_day = day
+        self.last_time = entry[0]
+        if self.num_buckets > 2 and self.size < self.num_buckets // 2:
+            self._resize(self.num_buckets // 2)
+        return entry
+
+    def __len__(self) -> int:
+        return self.size
+
+
+# schedulers that can be selected by name
+SCHEDULERS = {
+    'heap': HeapScheduler,
+    'calendar': CalendarQueueScheduler,
+}
@@ -0,0 +1,67 @@
+import typing
+import numpy as np
+if typing.TYPE_CHECKING:
+    from core import Service
+
+# layout of each record written to the service log
+SERVICE_RECORD_DTYPE = np.dtype([
+    ('service_id', np.int64),
+    ('arrival_time', np.float64),
+    ('holding_time', np.float64),
+    ('source_id', np.int32),
+    ('destination_id', np.int32),  # -1 if the service was not provisioned
+    ('priority', np.int32),
+    ('hops', np.int32),  # hops of the last route used, -1 if none
+    ('service_time', np.float64),  # NaN if the service was not provisioned
+    ('downtime', np.float64),
+    ('provisioned', np.bool_),
+    ('failed', np.bool_),
+    ('failed_before', np.bool_),
+    ('relocated', np.bool_),
+])
+
+
+class ServiceLog:
+    """
+    Columnar log of the services that left the system, i.e., rejected, departed or lost.
+    Records are kept in a fixed-size buffer which is appended to a binary file every time it is full,
+    so that the memory used does not depend on the number of arrivals.
+    The file can be read back with `read_service_log`.
+    """
+
+    def __init__(self, file_name: str, buffer_size: int = 10000):
+        self.file_name: str = file_name
+        self.buffer: np.ndarray = np.zeros(buffer_size, dtype=SERVICE_RECORD_DTYPE)
+        self.size: int = 0
+        open(self.file_name, 'wb').close()  # truncates the log of a previous run
+
+    def add(self, service: 'Service') -> None:
+        route = getattr(service, 'route', None)
+        self.buffer[self.size] = (service.service_id,
+                                  service.arrival_time,
+                                  service.holding_time,
+                                  service.source_id,
+                                  service.destination_id if service.provisioned else -1,
+                                  service.priority_class.priority,
+                                  route.hops if route is not None else -1,
+                                  service.service_time if service.service_time is not None else np.nan,
+                                  service.downtime,
+                                  service.provisioned,
+                                  service.failed,
+                                  service.failed_before,
+                                  service.relocated)
+        self.size += 1
+        if self.size == len(self.buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        with open(self.file_name, 'ab') as file:
+            self.buffer[:self.size].tofile(file)
+        self.size = 0
+
+
+def read_service_log(file_name: str) -> np.ndarray:
+    """
+    Reads a service log written by `ServiceLog` as a NumPy structured array.
+    """
+    return np.fromfile(file_name, dtype=SERVICE_RECORD_DTYPE)
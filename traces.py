@@ -0,0 +1,50 @@
+import numpy as np
+from traffic import TrafficGenerator
+
+
+def draw_disaster_schedule(rng: np.random.Generator, num_disasters: int, mean_failure_inter_arrival_time: float,
+                           mean_failure_duration: float) -> dict:
+    """
+    Draws the random values used by `Environment.setup_next_disaster` for each disaster:
+    the delay of the epicenter, the duration of the epicenter and of each cascade,
+    and the draws (from 1 to 100) that decide whether each cascade happens.
+    """
+    return {
+        'disaster_delays': rng.exponential(mean_failure_inter_arrival_time, num_disasters),
+        'disaster_durations': rng.exponential(mean_failure_duration, (num_disasters, 4)),
+        'cascade_draws': rng.integers(1, 100, (num_disasters, 3), endpoint=True).astype(np.int8),
+    }
+
+
+def generate_trace(traffic: TrafficGenerator, num_arrivals: int, disaster_rng: np.random.Generator, num_disasters: int,
+                   mean_failure_inter_arrival_time: float, mean_failure_duration: float) -> dict:
+    """
+    Generates the workload of one simulation, i.e., the arrivals and the disaster schedule, as compact arrays.
+    The values are the same as the ones drawn during a simulation using the same streams.
+    """
+    arrival_times, holding_times, sources, computing_units = traffic.draw(num_arrivals)
+    trace = {
+        'arrival_times': arrival_times,
+        'holding_times': holding_times,
+        'sources': sources.astype(np.int32),
+        'computing_units': computing_units.astype(np.int8),
+    }
+    trace.update(draw_disaster_schedule(disaster_rng, num_disasters, mean_failure_inter_arrival_time, mean_failure_duration))
+    return trace
+
+
+def save_trace(file_name: str, trace: dict) -> None:
+    np.savez(file_name, **trace)
+
+
+def load_trace(file_name: str) -> dict:
+    with np.load(file_name) as data:
+        return {key: data[key] for key in data.files}
+
+
+def as_lists(trace: dict) -> dict:
+    """
+    Converts the arrays of a trace into Python lists, which are faster to index one element at a time.
+    Values that are already lists are kept, so that a converted trace can be shared by several simulations.
+    """
+    return {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in trace.items()}
@@ -0,0 +1,86 @@
+import typing
+from typing import Tuple
+import numpy as np
+if typing.TYPE_CHECKING:
+    from random_streams import RandomStreams
+
+
+class TrafficGenerator:
+    """
+    Generates the service requests of a simulation.
+    Arrival times, holding times, sources and computing units are drawn from independent streams in blocks of
+    `block_size` arrivals with NumPy, and converted to Python lists so that obtaining the next arrival is only
+    a pointer increment.
+    Arrivals follow a Poisson process and holding times an exponential distribution.
+    """
+
+    def __init__(self, streams: 'RandomStreams', mean_inter_arrival_time: float, mean_holding_time: float,
+                 num_sources: int, min_computing_units: int = 1, max_computing_units: int = 5,
+                 block_size: int = 65536):
+        self.streams: 'RandomStreams' = streams
+        self.mean_inter_arrival_time: float = mean_inter_arrival_time
+        self.mean_holding_time: float = mean_holding_time
+        self.num_sources: int = num_sources
+        self.min_computing_units: int = min_computing_units
+        self.max_computing_units: int = max_computing_units
+        self.block_size: int = block_size
+
+        self.last_arrival_time: float = 0.
+        self.position: int = block_size  # forces drawing the first block
+        self.arrival_times: list = []
+        self.holding_times: list = []
+        self.sources: list = []
+        self.computing_units: list = []
+
+    def draw(self, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Draws the arrival times, holding times, source indices and computing units of the next `size` arrivals.
+        Arrival times are accumulated sequentially from the last arrival drawn, therefore the values do not
+        depend on how the arrivals are split into blocks.
+        """
+        inter_arrival_times = self.streams.arrivals.exponential(self.mean_inter_arrival_time, size)
+        arrival_times = np.cumsum(np.concatenate(([self.last_arrival_time], inter_arrival_times)))[1:]
+        self.last_arrival_time = float(arrival_times[-1])
+        holding_times = self.streams.holding_times.exponential(self.mean_holding_time, size)
+        sources = self.streams.sources.integers(0, self.num_sources, size)
+        computing_units = self.streams.sizes.integers(self.min_computing_units, self.max_computing_units, size,
+                                                      endpoint=True)
+        return arrival_times, holding_times, sources, computing_units
+
+    def _draw_block(self) -> None:
+        arrival_times, holding_times, sources, computing_units = self.draw(self.block_size)
+        self.arrival_times = arrival_times.tolist()
+        self.holding_times = holding_times.tolist()
+        self.sources = sources.tolist()
+        self.computing_units = computing_units.tolist()
+        self.position = 0
+
+    def next(self) -> Tuple[float, float, int, int]:
+        """
+        Returns the arrival time, holding time, index of the source in `topology.graph['source_nodes']`
+        and computing units of the next arrival.
+        """
+        if self.position == self.block_size:
+            self._draw_block()
+        position = self.position
+        self.position += 1
+        return self.arrival_times[position], self.holding_times[position], self.sources[position], self.computing_units[position]
+
+
+class ReplayTrafficGenerator:
+    """
+    Replays the arrivals stored in a trace (see `traces.generate_trace`), with the same interface as `TrafficGenerator`.
+    The trace must have been converted with `traces.as_lists`, and its lists are not copied.
+    """
+
+    def __init__(self, trace: dict):
+        self.arrival_times: list = trace['arrival_times']
+        self.holding_times: list = trace['holding_times']
+        self.sources: list = trace['sources']
+        self.computing_units: list = trace['computing_units']
+        self.position: int = 0
+
+    def next(self) -> Tuple[float, float, int, int]:
+        position = self.position
+        self.position += 1
+        return self.arrival_times[position], self.holding_times[position], self.sources[position], self.computing_units[position]